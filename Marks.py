@@ -1,12 +1,57 @@
 import streamlit as st
-import pandas as pd
 import numpy as np
-import joblib
-import plotly.express as px
-import plotly.graph_objects as go
 from datetime import datetime
+import os
 import time
 
+# Start of this script run - recorded as the 'rerun' span at the end
+_RUN_START = time.perf_counter()
+
+from model_registry import ModelRegistry
+from microbatch import MicroBatcher
+from result_cache import ResultCache
+from decision_store import DB_PATH, DecisionStore
+from rescore import import_marks, rescore
+from scoring import (FEATURES, MARK_COLUMNS, MAX_MARKS, COMPONENT_RULES, CLUSTER_NAMES,
+                     MARK_STEP, PASS_MARK, BORDERLINE_MARGIN, evaluate_rules, soft_assignment,
+                     read_roster, score_by_programme)
+from validation import validate_marks, summarize
+from cohort import summarize_cohort
+from archive import ARCHIVE_DIR, MarksArchive
+from timing import Timings, MetricsWriter
+
+# Artificial "thinking" delay in seconds for demos only - keep at 0 in production
+DEMO_DELAY = float(os.environ.get("EXAM_DEMO_DELAY", "0"))
+
+PROGRAMMES = [
+    "Bachelor of Science in Computer Science",
+    "Bachelor of Business Administration",
+    "Bachelor of Engineering",
+    "Bachelor of Education",
+    "Diploma in Information Technology",
+    "Other"
+]
+
+# Result/chart cache limits (entries, seconds)
+CACHE_SIZE = int(os.environ.get("EXAM_CACHE_SIZE", "2048"))
+CACHE_TTL = float(os.environ.get("EXAM_CACHE_TTL", "3600"))
+
+# Per-programme model residency limits, and the academic year to prefer models for
+MAX_MODELS = int(os.environ.get("EXAM_MAX_MODELS", "8"))
+MAX_MODEL_MB = float(os.environ.get("EXAM_MAX_MODEL_MB", "64"))
+ACADEMIC_YEAR = os.environ.get("EXAM_ACADEMIC_YEAR") or None
+
+# Partitioned Parquet archive of historical marks (see archive.py), if one has been ingested
+MARKS_ARCHIVE = os.environ.get("EXAM_MARKS_ARCHIVE", ARCHIVE_DIR)
+
+# SQLite file every decision and roster import is saved to (loadtest.py points this at a scratch copy)
+DECISIONS_DB = os.environ.get("EXAM_DECISIONS_DB") or DB_PATH
+
+# Hot-path timing spans (off by default) and an optional Prometheus text file
+TIMING = os.environ.get("EXAM_TIMING", "0") == "1"
+METRICS_FILE = os.environ.get("EXAM_METRICS_FILE") or None
+METRICS_INTERVAL = float(os.environ.get("EXAM_METRICS_INTERVAL", "15"))
+
 # Page configuration - MUST BE FIRST
 st.set_page_config(
     page_title="📚 University Exam Eligibility System",
@@ -209,40 +254,177 @@ st.markdown("""
 </h1>
 """, unsafe_allow_html=True)
 
-# Load model with caching
-@st.cache_resource(show_spinner="Loading AI Model...")
+# Per-process timing aggregates - shared by all sessions
+@st.cache_resource
+def get_timings():
+    return Timings(enabled=TIMING or bool(METRICS_FILE))
+
+timings = get_timings()
+
+# Model registry - one per server process; programme models load lazily on first use
+@st.cache_resource
+def get_registry():
+    return ModelRegistry(max_models=MAX_MODELS, max_bytes=int(MAX_MODEL_MB * 1024 * 1024))
+
+# Load the default model once per server process, shared by every session.
+# Spinners only show if the work takes longer than Streamlit's 0.5s threshold.
+@st.cache_resource(show_spinner="🔮 Initializing intelligent grading system...")
 def load_model():
-    with st.spinner("🔮 Initializing intelligent grading system..."):
-        time.sleep(2)
-        model = joblib.load('kmeans MARKS_model.pkl')
-        return model
+    if DEMO_DELAY:
+        time.sleep(DEMO_DELAY)
+    with timings.span('load_model'):
+        model = get_registry().get()
+
+        # Validate and warm up (builds/loads the lookup table) before any student needs it
+        if model.cluster_centers_.shape != (len(CLUSTER_NAMES), len(FEATURES)):
+            raise ValueError(f"Unexpected cluster centres shape {model.cluster_centers_.shape}")
+        model.predict(np.zeros((1, len(FEATURES))))
+    return model
+
+# Shared scorer - batches requests from all sessions into one vectorized predict
+@st.cache_resource
+def get_scorer():
+    return MicroBatcher(load_model(), timings=timings)
+
+# Shared cache of (cluster, distances, chart) keyed on the marks and model version
+@st.cache_resource
+def get_result_cache():
+    return ResultCache(maxsize=CACHE_SIZE, ttl=CACHE_TTL)
+
+# Every decision is saved (in the background) for later registry lookups
+@st.cache_resource
+def get_decision_store():
+    return DecisionStore(DECISIONS_DB)
+
+# Periodic Prometheus text file (spans plus cache/registry counters) for the node exporter
+@st.cache_resource
+def get_metrics_writer():
+    def gauges():
+        cache, models, queue = get_result_cache().stats(), get_registry().stats(), get_scorer().stats()
+        return {
+            "result_cache_hits": cache["hits"],
+            "result_cache_misses": cache["misses"],
+            "result_cache_entries": cache["entries"],
+            "model_registry_hits": models["hits"],
+            "model_registry_loads": models["loads"],
+            "model_registry_resident_bytes": models["resident_bytes"],
+            "scoring_requests": queue["requests"],
+            "scoring_batches": queue["batches"],
+        }
+    return MetricsWriter(timings, METRICS_FILE, METRICS_INTERVAL, gauges) if METRICS_FILE else None
+
+@timings.timed('distance_chart')
+def build_distance_chart(distances, cluster_names):
+    # Returns the chart as plotly JSON - safe to share between sessions through the result
+    # cache; each render rebuilds its own Figure. Heavy plotting imports are only paid for
+    # once a prediction is shown.
+    import pandas as pd
+    import plotly.express as px
+
+    dist_df = pd.DataFrame({
+        'Cluster': list(cluster_names.values()),
+        'Distance': distances
+    })
+
+    fig = px.bar(dist_df, 
+                x='Cluster', 
+                y='Distance',
+                title='Distance to Each Cluster (Lower = Better Match)',
+                color='Distance',
+                color_continuous_scale='Blues',
+                text=dist_df['Distance'].round(2))
+
+    fig.update_traces(textposition='outside')
+    fig.update_layout(
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='#2c3e50')
+    )
+    return fig.to_json()
+
+# Cohort aggregates - recomputed only when new decisions have been stored
+@st.cache_data(ttl=CACHE_TTL, max_entries=4, show_spinner="📊 Aggregating cohort...")
+def get_cohort_summary(records, n_clusters):
+    # records (the store's latest row id) is only here to key the cache
+    with timings.span('cohort_aggregate'):
+        return summarize_cohort(get_decision_store().cohort(), n_clusters)
+
+# Archive partitions (year, programme, rows) - footers only, refreshed every minute
+@st.cache_data(ttl=60, show_spinner=False)
+def get_archive_partitions():
+    return MarksArchive(MARKS_ARCHIVE).partitions()
+
+# One archived year (one programme or all) scored with each programme's own model and
+# aggregated; only those partitions are read
+@st.cache_data(ttl=CACHE_TTL, max_entries=16, show_spinner="🗄️ Reading marks archive...")
+def get_archive_summary(programme, year, model_versions):
+    # model_versions is only here to key the cache - a replaced model re-scores its partitions
+    with timings.span('archive_cohort'):
+        registry = get_registry()
+        cohort = MarksArchive(MARKS_ARCHIVE).cohort(registry.get, programme, year)
+        return summarize_cohort(cohort, registry.get().n_clusters)
+
+@timings.timed('cohort_charts')
+def build_cohort_charts(summary, model):
+    # Only aggregates reach the browser: bars of counts and one marker per occupied grid cell
+    import plotly.express as px
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+
+    names = [model.cluster_names.get(i, f"Cluster {i}") for i in range(len(summary['cluster_counts']))]
+    colors = [model.cluster_colors.get(i, "#1e3c72") for i in range(len(names))]
+    layout = dict(plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)', font=dict(color='#2c3e50'))
+
+    clusters = go.Figure(go.Bar(x=names, y=summary['cluster_counts'], marker_color=colors,
+                                text=summary['cluster_counts'], textposition='outside'))
+    clusters.update_layout(title='Students per Cluster', **layout)
+
+    histograms = make_subplots(rows=1, cols=len(summary['histograms']),
+                               subplot_titles=list(summary['histograms']))
+    for i, counts in enumerate(summary['histograms'].values(), start=1):
+        histograms.add_trace(go.Bar(x=np.arange(len(counts)) * MARK_STEP, y=counts, marker_color='#2a5298',
+                                    showlegend=False), row=1, col=i)
+    histograms.update_layout(title='Mark Distribution per Component', bargap=0.05, **layout)
+
+    by_programme = summary['by_programme']
+    programmes = px.bar(x=by_programme['programme'] * 2,
+                        y=np.concatenate([by_programme['eligible_manual_rate'],
+                                          by_programme['eligible_ai_rate']]) * 100,
+                        color=["Manual"] * len(by_programme['programme']) + ["AI"] * len(by_programme['programme']),
+                        barmode='group', labels={'x': 'Programme', 'y': 'Eligible (%)', 'color': 'Verdict'},
+                        title='Eligibility Rate by Programme',
+                        color_discrete_sequence=['#1e3c72', '#17a2b8'])
+    programmes.update_layout(**layout)
+
+    density = summary['density']
+    points, counts = density['points'], density['counts']
+    scatter = go.Figure()
+    for i, name in enumerate(names):
+        cells = density['cluster'] == i
+        if cells.any():
+            scatter.add_trace(go.Scatter3d(
+                x=points[cells, 0], y=points[cells, 1], z=points[cells, 2], mode='markers', name=name,
+                marker=dict(size=3 + 12 * np.sqrt(counts[cells] / counts.max()), color=colors[i], opacity=0.6),
+                text=counts[cells], hovertemplate='%{text} student(s)<extra></extra>'))
+    centers = model.cluster_centers_
+    scatter.add_trace(go.Scatter3d(
+        x=centers[:, 0], y=centers[:, 1], z=centers[:, 2], mode='markers', name='Centroids',
+        marker=dict(size=10, symbol='diamond', color=colors[:len(centers)], line=dict(color='black', width=2))))
+    scatter.update_layout(title='Students around the Centroids (marker size = students per mark cell)',
+                          scene=dict(xaxis_title='Assignment 1', yaxis_title='Test 1', zaxis_title='Test 2'),
+                          height=600, **layout)
+    return clusters, histograms, programmes, scatter
 
 # Load the model
 try:
-    model = load_model()
-    
-    # Define cluster meanings based on analysis
-    cluster_names = {
-        1: "🌟 EXCELLENT",
-        3: "✨ VERY GOOD", 
-        0: "📊 AVERAGE",
-        2: "⚠️ BELOW AVERAGE"
-    }
-    
-    cluster_colors = {
-        1: "#00d25b",  # Green
-        3: "#17a2b8",  # Teal
-        0: "#ffc107",  # Yellow
-        2: "#dc3545"   # Red
-    }
-    
-    cluster_eligibility = {
-        1: True,   # Excellent -> Eligible
-        3: True,   # Very Good -> Eligible
-        0: False,  # Average -> Not Eligible
-        2: False   # Below Average -> Not Eligible
-    }
-    
+    load_model()
+    registry = get_registry()
+    with timings.span('model_lookup'):
+        model = registry.get()  # default model - picks up a replaced file without a restart
+    scorer = get_scorer()
+    result_cache = get_result_cache()
+    decision_store = get_decision_store()
+    get_metrics_writer()
 except Exception as e:
     st.error(f"❌ Error loading model: {e}")
     st.stop()
@@ -261,15 +443,7 @@ with st.sidebar:
     # Student details
     student_name = st.text_input("📝 Full Name", placeholder="Enter your name", key="name")
     reg_no = st.text_input("🆔 Registration Number", placeholder="e.g., SC2023-001", key="reg")
-    programme = st.selectbox(
-        "📚 Programme of Study",
-        ["Bachelor of Science in Computer Science",
-         "Bachelor of Business Administration",
-         "Bachelor of Engineering",
-         "Bachelor of Education",
-         "Diploma in Information Technology",
-         "Other"]
-    )
+    programme = st.selectbox("📚 Programme of Study", PROGRAMMES, key="programme")
     
     st.markdown("---")
     
@@ -293,326 +467,530 @@ with st.sidebar:
         *Eligible for Final Exam: EXCELLENT & VERY GOOD*
         """)
 
-# Main content - Input Cards
-st.markdown("## 📝 Enter Your Continuous Assessment Marks")
-
-# Create 4 columns for inputs
-col1, col2, col3, col4 = st.columns(4)
-
-with col1:
-    st.markdown("<div class='input-card'>", unsafe_allow_html=True)
-    st.markdown("### 📝 Assignment 1")
-    st.markdown("<p style='color: #7f8c8d;'>Max: 5 marks</p>", unsafe_allow_html=True)
-    ass1 = st.number_input(
-        "Marks (0-5)",
-        min_value=0.0,
-        max_value=5.0,
-        value=2.5,
-        step=0.5,
-        key="ass1",
-        label_visibility="collapsed"
-    )
-    st.markdown(f"<div class='score-display'>{ass1:.1f}</div>", unsafe_allow_html=True)
-    st.markdown(f"<div class='score-label'>/ 5.0</div>", unsafe_allow_html=True)
-    st.markdown("</div>", unsafe_allow_html=True)
-
-with col2:
-    st.markdown("<div class='input-card'>", unsafe_allow_html=True)
-    st.markdown("### 📝 Assignment 2")
-    st.markdown("<p style='color: #7f8c8d;'>Max: 5 marks</p>", unsafe_allow_html=True)
-    ass2 = st.number_input(
-        "Marks (0-5)",
-        min_value=0.0,
-        max_value=5.0,
-        value=2.5,
-        step=0.5,
-        key="ass2",
-        label_visibility="collapsed"
-    )
-    st.markdown(f"<div class='score-display'>{ass2:.1f}</div>", unsafe_allow_html=True)
-    st.markdown(f"<div class='score-label'>/ 5.0</div>", unsafe_allow_html=True)
-    st.markdown("</div>", unsafe_allow_html=True)
-
-with col3:
-    st.markdown("<div class='input-card'>", unsafe_allow_html=True)
-    st.markdown("### 📋 Test 1")
-    st.markdown("<p style='color: #7f8c8d;'>Max: 15 marks</p>", unsafe_allow_html=True)
-    test1 = st.number_input(
-        "Marks (0-15)",
-        min_value=0.0,
-        max_value=15.0,
-        value=7.5,
-        step=0.5,
-        key="test1",
-        label_visibility="collapsed"
-    )
-    st.markdown(f"<div class='score-display'>{test1:.1f}</div>", unsafe_allow_html=True)
-    st.markdown(f"<div class='score-label'>/ 15.0</div>", unsafe_allow_html=True)
-    st.markdown("</div>", unsafe_allow_html=True)
-
-with col4:
-    st.markdown("<div class='input-card'>", unsafe_allow_html=True)
-    st.markdown("### 📋 Test 2")
-    st.markdown("<p style='color: #7f8c8d;'>Max: 15 marks</p>", unsafe_allow_html=True)
-    test2 = st.number_input(
-        "Marks (0-15)",
-        min_value=0.0,
-        max_value=15.0,
-        value=7.5,
-        step=0.5,
-        key="test2",
-        label_visibility="collapsed"
-    )
-    st.markdown(f"<div class='score-display'>{test2:.1f}</div>", unsafe_allow_html=True)
-    st.markdown(f"<div class='score-label'>/ 15.0</div>", unsafe_allow_html=True)
-    st.markdown("</div>", unsafe_allow_html=True)
+# Main content - split into fragments so a widget change only reruns its own
+# section instead of the whole page (CSS, sidebar, admin info...)
 
-# Calculate totals
-total_marks = ass1 + ass2 + test1 + test2
-percentage = (total_marks / 40) * 100
+# Input cards + performance summary - typing a mark reruns only this part
+@st.fragment
+@timings.timed('marks_section')
+def marks_section():
+    # Results on screen belong to the marks that were checked. Editing a mark reruns only
+    # this fragment, so once the marks differ rerun the page to clear the stale results.
+    checked = st.session_state.get('checked_marks')
+    if checked is not None and checked != tuple(st.session_state.get(c) for c in MARK_COLUMNS):
+        del st.session_state['checked_marks']
+        st.rerun()
 
-# Display summary metrics
-st.markdown("---")
-st.markdown("## 📊 Performance Summary")
-
-metric_col1, metric_col2, metric_col3, metric_col4, metric_col5 = st.columns(5)
-
-with metric_col1:
-    st.metric("📝 Assignments Total", f"{ass1 + ass2:.1f}/10", 
-              delta=f"{(ass1 + ass2)/10*100:.0f}%")
-
-with metric_col2:
-    st.metric("📋 Tests Total", f"{test1 + test2:.1f}/30",
-              delta=f"{(test1 + test2)/30*100:.0f}%")
-
-with metric_col3:
-    st.metric("🎯 Overall Total", f"{total_marks:.1f}/40",
-              delta=f"{percentage:.1f}%")
-
-with metric_col4:
-    if total_marks >= 32:
-        grade = "🌟 Excellent"
-        grade_color = "green"
-    elif total_marks >= 28:
-        grade = "✨ Very Good"
-        grade_color = "blue"
-    elif total_marks >= 20:
-        grade = "📊 Average"
-        grade_color = "orange"
-    else:
-        grade = "⚠️ Below Average"
-        grade_color = "red"
+    # Main content - Input Cards
+    st.markdown("## 📝 Enter Your Continuous Assessment Marks")
+
+    # Create 4 columns for inputs
+    col1, col2, col3, col4 = st.columns(4)
+
+    with col1:
+        st.markdown("<div class='input-card'>", unsafe_allow_html=True)
+        st.markdown("### 📝 Assignment 1")
+        st.markdown("<p style='color: #7f8c8d;'>Max: 5 marks</p>", unsafe_allow_html=True)
+        ass1 = st.number_input(
+            "Marks (0-5)",
+            min_value=0.0,
+            max_value=5.0,
+            value=2.5,
+            step=0.5,
+            key="ass1",
+            label_visibility="collapsed"
+        )
+        st.markdown(f"<div class='score-display'>{ass1:.1f}</div>", unsafe_allow_html=True)
+        st.markdown(f"<div class='score-label'>/ 5.0</div>", unsafe_allow_html=True)
+        st.markdown("</div>", unsafe_allow_html=True)
+
+    with col2:
+        st.markdown("<div class='input-card'>", unsafe_allow_html=True)
+        st.markdown("### 📝 Assignment 2")
+        st.markdown("<p style='color: #7f8c8d;'>Max: 5 marks</p>", unsafe_allow_html=True)
+        ass2 = st.number_input(
+            "Marks (0-5)",
+            min_value=0.0,
+            max_value=5.0,
+            value=2.5,
+            step=0.5,
+            key="ass2",
+            label_visibility="collapsed"
+        )
+        st.markdown(f"<div class='score-display'>{ass2:.1f}</div>", unsafe_allow_html=True)
+        st.markdown(f"<div class='score-label'>/ 5.0</div>", unsafe_allow_html=True)
+        st.markdown("</div>", unsafe_allow_html=True)
+
+    with col3:
+        st.markdown("<div class='input-card'>", unsafe_allow_html=True)
+        st.markdown("### 📋 Test 1")
+        st.markdown("<p style='color: #7f8c8d;'>Max: 15 marks</p>", unsafe_allow_html=True)
+        test1 = st.number_input(
+            "Marks (0-15)",
+            min_value=0.0,
+            max_value=15.0,
+            value=7.5,
+            step=0.5,
+            key="test1",
+            label_visibility="collapsed"
+        )
+        st.markdown(f"<div class='score-display'>{test1:.1f}</div>", unsafe_allow_html=True)
+        st.markdown(f"<div class='score-label'>/ 15.0</div>", unsafe_allow_html=True)
+        st.markdown("</div>", unsafe_allow_html=True)
+
+    with col4:
+        st.markdown("<div class='input-card'>", unsafe_allow_html=True)
+        st.markdown("### 📋 Test 2")
+        st.markdown("<p style='color: #7f8c8d;'>Max: 15 marks</p>", unsafe_allow_html=True)
+        test2 = st.number_input(
+            "Marks (0-15)",
+            min_value=0.0,
+            max_value=15.0,
+            value=7.5,
+            step=0.5,
+            key="test2",
+            label_visibility="collapsed"
+        )
+        st.markdown(f"<div class='score-display'>{test2:.1f}</div>", unsafe_allow_html=True)
+        st.markdown(f"<div class='score-label'>/ 15.0</div>", unsafe_allow_html=True)
+        st.markdown("</div>", unsafe_allow_html=True)
+
+    # Calculate totals, grade and eligibility with the shared rule table
+    rules = evaluate_rules([[ass1, ass2, test1, test2]])
+    total_marks = float(rules['total'][0])
+    percentage = float(rules['percentage'][0])
+
+    # Display summary metrics
+    st.markdown("---")
+    st.markdown("## 📊 Performance Summary")
+
+    metric_col1, metric_col2, metric_col3, metric_col4, metric_col5 = st.columns(5)
+
+    with metric_col1:
+        st.metric("📝 Assignments Total", f"{ass1 + ass2:.1f}/10", 
+                  delta=f"{(ass1 + ass2)/10*100:.0f}%")
+
+    with metric_col2:
+        st.metric("📋 Tests Total", f"{test1 + test2:.1f}/30",
+                  delta=f"{(test1 + test2)/30*100:.0f}%")
+
+    with metric_col3:
+        st.metric("🎯 Overall Total", f"{total_marks:.1f}/40",
+                  delta=f"{percentage:.1f}%")
+
+    with metric_col4:
+        st.metric("📈 Grade", rules['grade'][0], delta_color="off")
+
+    with metric_col5:
+        is_eligible_manual = bool(rules['eligible_manual'][0])
+        status = "✅ ELIGIBLE" if is_eligible_manual else "❌ NOT ELIGIBLE"
+        status_color = "normal" if is_eligible_manual else "inverse"
+        st.metric("🎓 Status", status, delta_color=status_color)
+
+    # Progress bar
+    st.progress(total_marks / 40, text=f"Overall Progress: {total_marks}/40 marks ({percentage:.1f}%)")
+
+
+# AI results - pressing the button reruns only this part
+@st.fragment
+@timings.timed('results_section')
+def ai_results_section():
+    # Marks and student details come from the widgets' session state
+    ass1, ass2 = st.session_state.ass1, st.session_state.ass2
+    test1, test2 = st.session_state.test1, st.session_state.test2
+    student_name, reg_no = st.session_state.name, st.session_state.reg
+    programme = st.session_state.programme
+    rules = evaluate_rules([[ass1, ass2, test1, test2]])
+    total_marks = float(rules['total'][0])
+    percentage = float(rules['percentage'][0])
+    is_eligible_manual = bool(rules['eligible_manual'][0])
     
-    st.metric("📈 Grade", grade, delta_color="off")
-
-with metric_col5:
-    is_eligible_manual = total_marks >= 28
-    status = "✅ ELIGIBLE" if is_eligible_manual else "❌ NOT ELIGIBLE"
-    status_color = "normal" if is_eligible_manual else "inverse"
-    st.metric("🎓 Status", status, delta_color=status_color)
-
-# Progress bar
-st.progress(total_marks / 40, text=f"Overall Progress: {total_marks}/40 marks ({percentage:.1f}%)")
-
-# Predict button
-col1, col2, col3 = st.columns([1, 2, 1])
-with col2:
-    predict_button = st.button("🔮 CHECK ELIGIBILITY WITH AI", use_container_width=True)
-
-if predict_button:
-    if not student_name or not reg_no:
-        st.warning("⚠️ Please fill in your name and registration number first!")
-    else:
-        with st.spinner("🔄 Analyzing your performance with AI..."):
-            time.sleep(2)
+    # Predict button
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col2:
+        predict_button = st.button("🔮 CHECK ELIGIBILITY WITH AI", key="check_eligibility",
+                                   use_container_width=True)
+
+    if predict_button:
+        if not student_name or not reg_no:
+            st.warning("⚠️ Please fill in your name and registration number first!")
+        else:
+            with st.spinner("🔄 Analyzing your performance with AI..."):
+                if DEMO_DELAY:
+                    time.sleep(DEMO_DELAY)
             
-            # Prepare data for prediction (model uses 3 features: ass1, test1, test2)
-            # Note: Model ina features 3 tu, so tunatumia ass1, test1, test2
-            input_data = np.array([[ass1, test1, test2]])
+                # Prepare data for prediction (model uses 3 features: ass1, test1, test2)
+                # Note: Model ina features 3 tu, so tunatumia ass1, test1, test2
             
-            # Predict cluster
-            cluster = model.predict(input_data)[0]
-            cluster_name = cluster_names.get(cluster, f"Cluster {cluster}")
-            is_eligible_ai = cluster_eligibility.get(cluster, False)
+                # Predict cluster (micro-batched with other sessions - also gives distances),
+                # reusing the cached result and chart when these marks were checked before
+                programme_model = registry.get(programme, ACADEMIC_YEAR)
+                cache_key = (ass1, ass2, test1, test2, programme_model.version)
+                cached = result_cache.get(cache_key)
+                if cached is None:
+                    with timings.span('score'):
+                        cluster, distances = scorer.score(ass1, test1, test2, model=programme_model)
+                    cached = (cluster, distances, build_distance_chart(distances, programme_model.cluster_names))
+                    result_cache.put(cache_key, cached)
+                cluster, distances, chart_json = cached
+                cluster_name = programme_model.cluster_names.get(cluster, f"Cluster {cluster}")
+                is_eligible_ai = programme_model.cluster_eligibility.get(cluster, False)
+                cluster_color = programme_model.cluster_colors.get(cluster, "#1e3c72")
+                soft = soft_assignment(distances, [cluster])
+                confidence, margin = float(soft['confidence'][0]), float(soft['margin'][0])
+
+                decision_store.record(reg_no, student_name, programme, ass1, ass2, test1, test2,
+                                      cluster, is_eligible_manual, is_eligible_ai, programme_model.version)
+                st.session_state['checked_marks'] = (ass1, ass2, test1, test2)
             
-            # Create results display
-            st.markdown("---")
-            st.markdown("## 🎯 AI Analysis Results")
+                # Create results display
+                st.markdown("---")
+                st.markdown("## 🎯 AI Analysis Results")
             
-            res_col1, res_col2 = st.columns(2)
+                res_col1, res_col2 = st.columns(2)
             
-            with res_col1:
-                st.markdown("### 🤖 AI Classification")
+                with res_col1:
+                    st.markdown("### 🤖 AI Classification")
                 
-                # Cluster card
-                st.markdown(f"""
-                <div style='background: {cluster_colors.get(cluster, "#1e3c72")}20; 
-                            border-radius: 15px; 
-                            padding: 25px;
-                            border-left: 5px solid {cluster_colors.get(cluster, "#1e3c72")};
-                            box-shadow: 0 5px 15px rgba(0,0,0,0.1);'>
-                    <h3 style='color: {cluster_colors.get(cluster, "#1e3c72")}; margin: 0;'>
-                        {cluster_name}
-                    </h3>
-                    <p style='color: #2c3e50; margin-top: 10px; font-size: 16px;'>
-                        Based on AI analysis of your performance pattern
-                    </p>
-                    <div style='margin-top: 15px;'>
-                        <span style='background: {cluster_colors.get(cluster, "#1e3c72")}; 
-                                     color: white; 
-                                     padding: 8px 15px; 
-                                     border-radius: 20px;
-                                     font-size: 14px;'>
-                            Confidence: {(100 - np.random.randint(5, 15)):.0f}%
-                        </span>
+                    # Cluster card
+                    st.markdown(f"""
+                    <div style='background: {cluster_color}20; 
+                                border-radius: 15px; 
+                                padding: 25px;
+                                border-left: 5px solid {cluster_color};
+                                box-shadow: 0 5px 15px rgba(0,0,0,0.1);'>
+                        <h3 style='color: {cluster_color}; margin: 0;'>
+                            {cluster_name}
+                        </h3>
+                        <p style='color: #2c3e50; margin-top: 10px; font-size: 16px;'>
+                            Based on AI analysis of your performance pattern
+                        </p>
+                        <div style='margin-top: 15px;'>
+                            <span style='background: {cluster_color}; 
+                                         color: white; 
+                                         padding: 8px 15px; 
+                                         border-radius: 20px;
+                                         font-size: 14px;'>
+                                Confidence: {confidence:.0%}
+                            </span>
+                            <span style='color: #2c3e50; font-size: 14px; margin-left: 10px;'>
+                                Margin to next cluster: {margin:.2f}{" ⚖️ borderline" if margin < BORDERLINE_MARGIN else ""}
+                            </span>
+                        </div>
                     </div>
-                </div>
-                """, unsafe_allow_html=True)
-                
-                # Show cluster comparison
-                st.markdown("### 📊 Cluster Comparison")
-                distances = np.linalg.norm(model.cluster_centers_ - input_data, axis=1)
-                dist_df = pd.DataFrame({
-                    'Cluster': list(cluster_names.values()),
-                    'Distance': distances
-                })
-                
-                fig = px.bar(dist_df, 
-                            x='Cluster', 
-                            y='Distance',
-                            title='Distance to Each Cluster (Lower = Better Match)',
-                            color='Distance',
-                            color_continuous_scale='Blues',
-                            text=dist_df['Distance'].round(2))
+                    """, unsafe_allow_html=True)
                 
-                fig.update_traces(textposition='outside')
-                fig.update_layout(
-                    plot_bgcolor='rgba(0,0,0,0)',
-                    paper_bgcolor='rgba(0,0,0,0)',
-                    font=dict(color='#2c3e50')
-                )
-                st.plotly_chart(fig, use_container_width=True)
+                    # Show cluster comparison
+                    st.markdown("### 📊 Cluster Comparison")
+                    import plotly.io as pio
+                    st.plotly_chart(pio.from_json(chart_json), use_container_width=True)
             
-            with res_col2:
-                st.markdown("### ✅ Eligibility Status")
+                with res_col2:
+                    st.markdown("### ✅ Eligibility Status")
                 
-                # Compare manual vs AI
-                if is_eligible_manual and is_eligible_ai:
-                    st.markdown("""
-                    <div class='eligibility-badge'>
-                        🎉 ELIGIBLE FOR FINAL EXAM
-                    </div>
-                    """, unsafe_allow_html=True)
+                    # Compare manual vs AI
+                    if is_eligible_manual and is_eligible_ai:
+                        st.markdown("""
+                        <div class='eligibility-badge'>
+                            🎉 ELIGIBLE FOR FINAL EXAM
+                        </div>
+                        """, unsafe_allow_html=True)
                     
-                    st.balloons()
+                        st.balloons()
                     
-                    st.markdown("""
-                    <div style='background: #00d25b20; 
-                                border-radius: 15px; 
-                                padding: 20px;
-                                margin-top: 20px;
-                                border-left: 5px solid #00d25b;'>
-                        <h4 style='color: #00d25b;'>📝 Congratulations!</h4>
-                        <p style='color: #2c3e50;'>You have qualified for the University Final Examination.</p>
-                        <hr>
-                        <p><b>Exam Details:</b></p>
-                        <ul>
-                            <li><b>Date:</b> December 15, 2024</li>
-                            <li><b>Time:</b> 9:00 AM - 12:00 PM</li>
-                            <li><b>Venue:</b> Main Examination Hall</li>
-                            <li><b>Requirements:</b> Student ID, Calculator, Pens</li>
-                        </ul>
-                    </div>
-                    """, unsafe_allow_html=True)
+                        st.markdown("""
+                        <div style='background: #00d25b20; 
+                                    border-radius: 15px; 
+                                    padding: 20px;
+                                    margin-top: 20px;
+                                    border-left: 5px solid #00d25b;'>
+                            <h4 style='color: #00d25b;'>📝 Congratulations!</h4>
+                            <p style='color: #2c3e50;'>You have qualified for the University Final Examination.</p>
+                            <hr>
+                            <p><b>Exam Details:</b></p>
+                            <ul>
+                                <li><b>Date:</b> December 15, 2024</li>
+                                <li><b>Time:</b> 9:00 AM - 12:00 PM</li>
+                                <li><b>Venue:</b> Main Examination Hall</li>
+                                <li><b>Requirements:</b> Student ID, Calculator, Pens</li>
+                            </ul>
+                        </div>
+                        """, unsafe_allow_html=True)
                     
-                elif not is_eligible_manual and not is_eligible_ai:
-                    st.markdown("""
-                    <div class='ineligibility-badge'>
-                        ❌ NOT ELIGIBLE FOR FINAL EXAM
-                    </div>
-                    """, unsafe_allow_html=True)
+                    elif not is_eligible_manual and not is_eligible_ai:
+                        st.markdown("""
+                        <div class='ineligibility-badge'>
+                            ❌ NOT ELIGIBLE FOR FINAL EXAM
+                        </div>
+                        """, unsafe_allow_html=True)
                     
-                    st.snow()
+                        st.snow()
                     
-                    st.markdown("""
-                    <div style='background: #ff416c20; 
-                                border-radius: 15px; 
-                                padding: 20px;
-                                margin-top: 20px;
-                                border-left: 5px solid #ff416c;'>
-                        <h4 style='color: #ff416c;'>📝 Improvement Plan:</h4>
-                        <ul style='color: #2c3e50;'>
-                            <li>Attend remedial classes (Starting next week)</li>
-                            <li>Submit supplementary assignments</li>
-                            <li>Schedule meeting with academic advisor</li>
-                            <li>Re-assessment opportunity in January 2025</li>
-                        </ul>
-                        <div style='background: white; padding: 10px; border-radius: 10px; margin-top: 10px;'>
-                            <p><b>Required minimum:</b> 28/40 marks (70%)</p>
-                            <p><b>Your current:</b> {total_marks}/40 marks ({percentage:.1f}%)</p>
-                            <p><b>Need:</b> {max(0, 28 - total_marks):.1f} more marks</p>
+                        st.markdown("""
+                        <div style='background: #ff416c20; 
+                                    border-radius: 15px; 
+                                    padding: 20px;
+                                    margin-top: 20px;
+                                    border-left: 5px solid #ff416c;'>
+                            <h4 style='color: #ff416c;'>📝 Improvement Plan:</h4>
+                            <ul style='color: #2c3e50;'>
+                                <li>Attend remedial classes (Starting next week)</li>
+                                <li>Submit supplementary assignments</li>
+                                <li>Schedule meeting with academic advisor</li>
+                                <li>Re-assessment opportunity in January 2025</li>
+                            </ul>
+                            <div style='background: white; padding: 10px; border-radius: 10px; margin-top: 10px;'>
+                                <p><b>Required minimum:</b> 28/40 marks (70%)</p>
+                                <p><b>Your current:</b> {total_marks}/40 marks ({percentage:.1f}%)</p>
+                                <p><b>Need:</b> {shortfall:.1f} more marks</p>
+                            </div>
                         </div>
-                    </div>
-                    """.format(total_marks=total_marks, percentage=percentage), unsafe_allow_html=True)
+                        """.format(total_marks=total_marks, percentage=percentage,
+                                   shortfall=max(0, PASS_MARK - total_marks)), unsafe_allow_html=True)
                     
-                else:
-                    # Mismatch between manual and AI (interesting case)
-                    st.warning("⚠️ AI and Manual calculations show different results!")
-                    
-                    if is_eligible_manual and not is_eligible_ai:
-                        st.info("📌 AI suggests you need more improvement despite meeting minimum marks.")
                     else:
-                        st.info("📌 AI sees potential in your performance pattern.")
+                        # Mismatch between manual and AI (interesting case)
+                        st.warning("⚠️ AI and Manual calculations show different results!")
+                    
+                        if is_eligible_manual and not is_eligible_ai:
+                            st.info("📌 AI suggests you need more improvement despite meeting minimum marks.")
+                        else:
+                            st.info("📌 AI sees potential in your performance pattern.")
+
+                    # Exact what-if from the precomputed index: smallest single-component
+                    # raise that passes both the pass mark and the AI verdict
+                    if not (is_eligible_manual and is_eligible_ai):
+                        *needed, combined = programme_model.marks_needed([[ass1, ass2, test1, test2]])[0]
+                        marks = dict(zip(MARK_COLUMNS, (ass1, ass2, test1, test2)))
+                        options = [f"<li>Raise <b>{COMPONENT_RULES[c][0]}</b> by {n:.1f} "
+                                   f"(to {marks[c] + n:.1f}/{MAX_MARKS[c]:.0f})</li>"
+                                   for c, n in zip(MARK_COLUMNS, needed) if n > 0]
+                        if options:
+                            advice = "<ul>" + "".join(options) + "</ul>"
+                        elif combined > 0:
+                            advice = (f"<p>No single component is enough - you need at least "
+                                      f"{combined:.1f} more marks spread across several components.</p>")
+                        else:
+                            advice = ("<p>No combination of higher marks passes both checks under the "
+                                      "current model - please see your academic advisor.</p>")
+                        st.markdown(f"""
+                        <div class='info-box'>
+                            <h4 style='color: #1e3c72;'>🎯 What would make you eligible?</h4>
+                            {advice}
+                        </div>
+                        """, unsafe_allow_html=True)
             
-            # Additional insights
-            st.markdown("---")
-            st.markdown("### 📈 Detailed Performance Analysis")
+                # Additional insights
+                st.markdown("---")
+                st.markdown("### 📈 Detailed Performance Analysis")
             
-            insight_col1, insight_col2, insight_col3 = st.columns(3)
+                insight_col1, insight_col2, insight_col3 = st.columns(3)
             
-            with insight_col1:
-                st.markdown("""
-                <div class='info-box'>
-                    <h4 style='color: #1e3c72;'>📊 Assignment Performance</h4>
-                    <p>Assignment 1: {}/5</p>
-                    <p>Assignment 2: {}/5</p>
-                    <p><b>Total: {}/10 ({}%)</b></p>
-                </div>
-                """.format(ass1, ass2, ass1+ass2, (ass1+ass2)/10*100), unsafe_allow_html=True)
+                with insight_col1:
+                    st.markdown("""
+                    <div class='info-box'>
+                        <h4 style='color: #1e3c72;'>📊 Assignment Performance</h4>
+                        <p>Assignment 1: {}/5</p>
+                        <p>Assignment 2: {}/5</p>
+                        <p><b>Total: {}/10 ({}%)</b></p>
+                    </div>
+                    """.format(ass1, ass2, ass1+ass2, (ass1+ass2)/10*100), unsafe_allow_html=True)
             
-            with insight_col2:
-                st.markdown("""
-                <div class='info-box'>
-                    <h4 style='color: #1e3c72;'>📋 Test Performance</h4>
-                    <p>Test 1: {}/15</p>
-                    <p>Test 2: {}/15</p>
-                    <p><b>Total: {}/30 ({}%)</b></p>
-                </div>
-                """.format(test1, test2, test1+test2, (test1+test2)/30*100), unsafe_allow_html=True)
+                with insight_col2:
+                    st.markdown("""
+                    <div class='info-box'>
+                        <h4 style='color: #1e3c72;'>📋 Test Performance</h4>
+                        <p>Test 1: {}/15</p>
+                        <p>Test 2: {}/15</p>
+                        <p><b>Total: {}/30 ({}%)</b></p>
+                    </div>
+                    """.format(test1, test2, test1+test2, (test1+test2)/30*100), unsafe_allow_html=True)
             
-            with insight_col3:
-                strengths = []
-                if ass1 >= 4: strengths.append("Assignment 1")
-                if ass2 >= 4: strengths.append("Assignment 2")
-                if test1 >= 12: strengths.append("Test 1")
-                if test2 >= 12: strengths.append("Test 2")
-                
-                weaknesses = []
-                if ass1 < 2.5: weaknesses.append("Assignment 1")
-                if ass2 < 2.5: weaknesses.append("Assignment 2")
-                if test1 < 7.5: weaknesses.append("Test 1")
-                if test2 < 7.5: weaknesses.append("Test 2")
-                
-                st.markdown("""
-                <div class='info-box'>
-                    <h4 style='color: #1e3c72;'>💪 Strengths & Areas</h4>
-                    <p><b style='color: #00d25b;'>✓ Strengths:</b> {}</p>
-                    <p><b style='color: #ff416c;'>⚠️ Improve:</b> {}</p>
-                </div>
-                """.format(
-                    ", ".join(strengths) if strengths else "None",
-                    ", ".join(weaknesses) if weaknesses else "None"
-                ), unsafe_allow_html=True)
+                with insight_col3:
+                    st.markdown("""
+                    <div class='info-box'>
+                        <h4 style='color: #1e3c72;'>💪 Strengths & Areas</h4>
+                        <p><b style='color: #00d25b;'>✓ Strengths:</b> {}</p>
+                        <p><b style='color: #ff416c;'>⚠️ Improve:</b> {}</p>
+                    </div>
+                    """.format(rules['strengths'][0], rules['weaknesses'][0]), unsafe_allow_html=True)
+
+
+def score_roster_by_programme(df):
+    # One vectorized predict per programme-year, each with that programme's model - the same
+    # model the single-student check, batch_score.py and the stored-roster re-score use
+    return score_by_programme(registry.get, df, ACADEMIC_YEAR)
+
+
+# Bulk roster upload - score a whole class in one vectorized predict per programme
+@st.fragment
+@timings.timed('roster_section')
+def roster_section():
+    st.markdown("---")
+    with st.expander("📂 Bulk Roster Upload (Staff)"):
+        st.markdown("""
+        Upload a CSV or Excel roster with columns **ass1, ass2, test1, test2**
+        (plus any identifiers such as *reg_no* and *student_name*, which are kept as-is).
+        A *programme* column scores each row with that programme's model.
+        Marks must be in range and in 0.5 steps; blank or duplicate *reg_no* values are rejected.
+        """)
+        roster_file = st.file_uploader("Roster file", type=["csv", "xlsx", "xls"], key="roster")
+
+        if roster_file is not None:
+            try:
+                with timings.span('roster_read'):
+                    roster = read_roster(roster_file)
+                with timings.span('roster_validate'):
+                    clean_rows, problems = validate_marks(roster)
+            except Exception as e:
+                st.error(f"❌ Could not read roster: {e}")
+            else:
+                if len(problems):
+                    st.warning(f"⚠️ {problems['row'].nunique()} row(s) skipped - see the validation report")
+                    st.json(summarize(problems))
+                    st.dataframe(problems, use_container_width=True)
+
+                if len(clean_rows):
+                    with timings.span('roster_score'):
+                        results = score_roster_by_programme(clean_rows)
+
+                    roster_col1, roster_col2, roster_col3, roster_col4 = st.columns(4)
+                    with roster_col1:
+                        st.metric("👥 Students Scored", f"{len(results)}")
+                    with roster_col2:
+                        st.metric("✅ Eligible (Manual)", f"{int(results['eligible_manual'].sum())}")
+                    with roster_col3:
+                        st.metric("🤖 Eligible (AI)", f"{int(results['eligible_ai'].sum())}")
+                    with roster_col4:
+                        st.metric("⚖️ Borderline (AI)", f"{int(results['borderline'].sum())}")
+
+                    st.dataframe(results, use_container_width=True)
+                    st.download_button(
+                        "⬇️ Download Results (CSV)",
+                        results.to_csv(index=False).encode('utf-8'),
+                        file_name=f"eligibility_results_{datetime.now():%Y%m%d_%H%M}.csv",
+                        mime="text/csv"
+                    )
+
+                    # Keep the marks in the stored roster; only new or corrected rows get re-scored
+                    if 'reg_no' in clean_rows.columns and st.button("💾 Save to stored roster", key="roster_save"):
+                        changed, _ = import_marks(decision_store, clean_rows, year=ACADEMIC_YEAR)
+                        with timings.span('roster_rescore'):
+                            done = rescore(decision_store, registry)
+                        rescored = sum(saved for _, saved in done.values())
+                        st.success(f"✅ {changed} new or changed row(s) saved, {rescored} re-scored")
+
+
+# Admin expander
+@st.fragment
+@timings.timed('admin_section')
+def admin_section():
+    with st.expander("🔧 System Information (Admin Only)"):
+        col1, col2 = st.columns(2)
+        with col1:
+            st.json({
+                "model_type": type(model).__name__,
+                "model_version": model.version,
+                "n_clusters": model.n_clusters,
+                "features": model.n_features_in_,
+                "total_marks_system": 40,
+                "pass_mark": PASS_MARK
+            })
+            st.write("**Scoring Queue:**")
+            st.json(scorer.stats())
+            st.write("**Result Cache:**")
+            st.json(result_cache.stats())
+            st.write("**Model Registry:**")
+            st.json(registry.stats())
+            st.write("**Timing Spans (this process):**")
+            if timings.enabled:
+                st.json(timings.stats())
+            else:
+                st.caption("Off - set EXAM_TIMING=1 (or EXAM_METRICS_FILE) to collect spans.")
+        with col2:
+            st.write("**Cluster Centers:**")
+            # Plain markdown table - no need to import pandas for a 4x3 grid
+            rows = ["| | Assignment | Test 1 | Test 2 |", "|---|---|---|---|"]
+            rows += [f"| Cluster {i} | " + " | ".join(f"{v:.4f}" for v in center) + " |"
+                     for i, center in enumerate(model.cluster_centers_)]
+            st.markdown("\n".join(rows))
+
+        # Eligibility records - indexed queries instead of re-scoring everyone
+        st.write("**Eligibility Records:**")
+        st.json(decision_store.stats())
+        lookup_col1, lookup_col2 = st.columns(2)
+        with lookup_col1:
+            lookup_reg = st.text_input("🔎 Registration number", key="lookup_reg")
+            if lookup_reg:
+                st.dataframe(decision_store.history(lookup_reg.strip()), use_container_width=True)
+        with lookup_col2:
+            lookup_programme = st.selectbox("📚 Eligible students in programme", PROGRAMMES,
+                                            key="lookup_programme")
+            if st.button("Show eligible students", key="lookup_eligible"):
+                st.dataframe(decision_store.eligible_students(lookup_programme), use_container_width=True)
+
+        # Stored roster - re-scores only corrected rows and rows scored by a replaced model
+        st.write("**Stored Roster:**")
+        if st.toggle("🗂️ Show stored roster status", key="roster_status"):
+            st.json(decision_store.roster_stats())
+        if st.button("🔄 Re-score changed rows", key="roster_rescore"):
+            with timings.span('roster_rescore'):
+                done = rescore(decision_store, registry)
+            st.success(f"✅ Re-scored {sum(saved for _, saved in done.values())} row(s)")
+
+        # Cohort analytics - aggregated server-side over every student's latest decision
+        st.write("**Cohort Analytics:**")
+        if st.toggle("📊 Show cohort dashboard", key="cohort_dashboard"):
+            cohort_model, source = model, "Latest decisions"
+            if os.path.isdir(MARKS_ARCHIVE):
+                partitions = get_archive_partitions()
+                years = sorted({p['year'] for p in partitions if p['year'] is not None}, reverse=True)
+                source_col1, source_col2 = st.columns(2)
+                with source_col1:
+                    source = st.selectbox("🗄️ Source", ["Latest decisions"] + years, key="cohort_source")
+                if source != "Latest decisions":
+                    with source_col2:
+                        archived = sorted(p['programme'] for p in partitions
+                                          if p['year'] == source and p['programme'])
+                        choice = st.selectbox("📚 Programme", ["All programmes"] + archived,
+                                              key="cohort_programme")
+                    archive_programme = None if choice == "All programmes" else choice
+                    selected = archived if archive_programme is None else [archive_programme]
+                    model_versions = tuple(registry.get(p, source).version for p in selected)
+                    if archive_programme is not None:
+                        cohort_model = registry.get(archive_programme, source)
+
+            if source == "Latest decisions":
+                summary = get_cohort_summary(decision_store.stats()["records"], model.n_clusters)
+            else:
+                summary = get_archive_summary(archive_programme, source, model_versions)
+            if not summary['students']:
+                st.info("No decisions recorded yet." if source == "Latest decisions"
+                        else "No archived marks for this selection.")
+            else:
+                cohort_col1, cohort_col2, cohort_col3 = st.columns(3)
+                with cohort_col1:
+                    st.metric("👥 Students", f"{summary['students']:,}")
+                with cohort_col2:
+                    st.metric("✅ Eligible (Manual)", f"{summary['eligible_manual'] / summary['students']:.1%}")
+                with cohort_col3:
+                    st.metric("🤖 Eligible (AI)", f"{summary['eligible_ai'] / summary['students']:.1%}")
+
+                clusters, histograms, programmes, scatter = build_cohort_charts(summary, cohort_model)
+                chart_col1, chart_col2 = st.columns(2)
+                with chart_col1:
+                    st.plotly_chart(clusters, use_container_width=True)
+                with chart_col2:
+                    st.plotly_chart(programmes, use_container_width=True)
+                st.plotly_chart(histograms, use_container_width=True)
+                st.plotly_chart(scatter, use_container_width=True)
+
+
+marks_section()
+ai_results_section()
+
+st.markdown("---")
+roster_section()
 
 # Footer
 st.markdown("""
@@ -622,22 +1000,6 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
-# Admin expander
-with st.expander("🔧 System Information (Admin Only)"):
-    col1, col2 = st.columns(2)
-    with col1:
-        st.json({
-            "model_type": type(model).__name__,
-            "n_clusters": model.n_clusters,
-            "features": model.n_features_in_,
-            "total_marks_system": 40,
-            "pass_mark": 28
-        })
-    with col2:
-        st.write("**Cluster Centers:**")
-        centers_df = pd.DataFrame(
-            model.cluster_centers_,
-            columns=['Assignment', 'Test 1', 'Test 2'],
-            index=[f'Cluster {i}' for i in range(4)]
-        )
-        st.dataframe(centers_df)
\ No newline at end of file
+admin_section()
+
+timings.record('rerun', time.perf_counter() - _RUN_START)
@@ -0,0 +1,274 @@
+"""Partitioned columnar archive of historical marks.
+
+Loose mark CSVs are ingested once into zstd-compressed Parquet, partitioned
+Hive-style by academic year and programme:
+
+    marks_archive/year=2024/programme=Bachelor%20of%20Engineering/part-<id>-0.parquet
+
+Readers open the files memory-mapped and push the column selection and the
+year/programme predicates down to the scan, so one programme-year reads
+only its own directory and only the columns asked for. Scoring
+(batch_score.py), retraining (retrain.py) and cohort analytics accept an
+archive directory wherever they accept a marks file.
+
+    python archive.py ingest marks_2024.csv --year 2024 --programme "Bachelor of Engineering"
+    python archive.py ingest history/*.csv            # year/programme columns in the files
+    python archive.py partitions
+    python archive.py cohort --year 2024 --programme "Bachelor of Engineering"
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import uuid
+
+import numpy as np
+
+from scoring import CLUSTER_ELIGIBILITY, FEATURES, MARK_COLUMNS, evaluate_rules, iter_chunks
+from validation import REG_COLUMN, validate_marks
+
+ARCHIVE_DIR = 'marks_archive'
+ROW_GROUP_SIZE = 128 * 1024
+
+
+def _pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+    except ImportError:
+        raise ImportError("The marks archive needs pyarrow: pip install pyarrow") from None
+    return pa, ds
+
+
+def _schemas():
+    # (file schema, partition schema); year/programme live only in the directory names
+    pa, ds = _pyarrow()
+    partition = pa.schema([('year', pa.int32()), ('programme', pa.string())])
+    schema = pa.schema([(REG_COLUMN, pa.string())] + [(c, pa.float64()) for c in MARK_COLUMNS]
+                       + list(zip(partition.names, partition.types)))
+    return schema, ds.partitioning(partition, flavor='hive')
+
+
+def _marks(table):
+    # (n, 4) float array in MARK_COLUMNS order, straight from the Arrow columns
+    if not table.num_rows:
+        return np.empty((0, len(MARK_COLUMNS)))
+    return np.column_stack([table.column(c).to_numpy() for c in MARK_COLUMNS])
+
+
+def _record_batches(paths, schema, programme, year, chunksize, counts):
+    # Validated marks from each file as Arrow record batches; counts = [rows, rejected]
+    import pandas as pd
+
+    for path in paths:
+        for chunk in iter_chunks(path, chunksize):
+            for name, value in (('programme', programme), ('year', year)):
+                if name not in chunk.columns:
+                    if value is None:
+                        raise ValueError(f"{path}: no '{name}' column - pass --{name}")
+                    chunk[name] = value
+                elif value is not None:
+                    blank = chunk[name].astype('string').str.strip().fillna('') == ''
+                    chunk[name] = chunk[name].where(~blank, value)
+            clean, report = validate_marks(chunk, check_reg_no=False)
+            # Every archived row needs an academic year and a programme - validate_marks has
+            # rejected years such as "2024/25"; blanks are rejected here rather than filed under
+            # a null-year or empty-programme partition
+            years = clean['year']
+            programmes = clean['programme'].astype('string').str.strip()
+            bad = (years.isna() | programmes.isna() | (programmes == '')).to_numpy(dtype=bool)
+            counts[1] += report['row'].nunique() + int(bad.sum())
+            clean, years, programmes = clean[~bad], years[~bad], programmes[~bad]
+            if not len(clean):
+                continue
+            frame = pd.DataFrame({
+                REG_COLUMN: (clean[REG_COLUMN].astype('string').str.strip() if REG_COLUMN in clean.columns
+                             else pd.Series(pd.NA, index=clean.index, dtype='string')),
+                **{c: clean[c] for c in MARK_COLUMNS},
+                'year': years.astype('int32'),
+                'programme': programmes,
+            })
+            counts[0] += len(frame)
+            yield from _pyarrow()[0].Table.from_pandas(frame, schema=schema, preserve_index=False).to_batches()
+
+
+def ingest(paths, archive_dir=ARCHIVE_DIR, programme=None, year=None, chunksize=100_000, replace=False):
+    # Appends the valid rows of CSV/Parquet mark files to the archive (replace=True first
+    # clears the year/programme partitions being written). Returns (rows written, rows rejected).
+    _, ds = _pyarrow()
+    schema, partitioning = _schemas()
+    counts = [0, 0]
+    ds.write_dataset(
+        _record_batches(paths, schema, programme, year, chunksize, counts), archive_dir,
+        schema=schema, format='parquet', partitioning=partitioning,
+        file_options=ds.ParquetFileFormat().make_write_options(compression='zstd'),
+        # Unique per ingest, so appending never overwrites earlier files
+        basename_template=f"part-{uuid.uuid4().hex[:12]}-{{i}}.parquet",
+        existing_data_behavior='delete_matching' if replace else 'overwrite_or_ignore',
+        min_rows_per_group=min(chunksize, ROW_GROUP_SIZE), max_rows_per_group=ROW_GROUP_SIZE)
+    return counts[0], counts[1]
+
+
+class MarksArchive:
+
+    def __init__(self, path=ARCHIVE_DIR):
+        self.path = path
+        self._dataset = None
+
+    @property
+    def dataset(self):
+        # Discovered once; call refresh() after ingesting into the same directory
+        if self._dataset is None:
+            from pyarrow import fs
+            _, ds = _pyarrow()
+            if not os.path.isdir(self.path):
+                raise FileNotFoundError(f"No marks archive at {self.path}")
+            self._dataset = ds.dataset(self.path, format='parquet', partitioning=_schemas()[1],
+                                       filesystem=fs.LocalFileSystem(use_mmap=True))
+        return self._dataset
+
+    def refresh(self):
+        self._dataset = None
+
+    def _filter(self, programme=None, year=None):
+        # programme/year: one value or a list of values; None means all
+        _, ds = _pyarrow()
+        expr = None
+        for name, value in (('programme', programme), ('year', year)):
+            if value is None:
+                continue
+            values = list(value) if isinstance(value, (list, tuple, set)) else [value]
+            if name == 'year':
+                values = [int(v) for v in values]
+            term = ds.field(name).isin(values)
+            expr = term if expr is None else expr & term
+        return expr
+
+    def table(self, columns=None, programme=None, year=None):
+        # Arrow table of just these columns and partitions
+        return self.dataset.to_table(columns=columns, filter=self._filter(programme, year))
+
+    def iter_frames(self, columns=None, programme=None, year=None, batch_size=100_000):
+        # DataFrames of at most batch_size rows, streamed partition by partition
+        scanner = self.dataset.scanner(columns=columns, filter=self._filter(programme, year),
+                                       batch_size=batch_size)
+        for batch in scanner.to_batches():
+            if batch.num_rows:
+                yield batch.to_pandas()
+
+    def marks(self, programme=None, year=None):
+        return _marks(self.table(MARK_COLUMNS, programme, year))
+
+    def partitions(self):
+        # [{year, programme, rows, files}] from the Parquet footers - no data pages read
+        _, ds = _pyarrow()
+        parts = {}
+        for fragment in self.dataset.get_fragments():
+            keys = ds.get_partition_keys(fragment.partition_expression)
+            entry = parts.setdefault((keys.get('year'), keys.get('programme')), [0, 0])
+            entry[0] += fragment.metadata.num_rows
+            entry[1] += 1
+        order = sorted(parts, key=lambda key: (key[0] or 0, key[1] or ''))
+        return [{'year': y, 'programme': p, 'rows': parts[y, p][0], 'files': parts[y, p][1]} for y, p in order]
+
+    def years(self):
+        return sorted({p['year'] for p in self.partitions() if p['year'] is not None})
+
+    def cohort(self, model_for, programme=None, year=None):
+        # Scores the selected partitions, each programme-year with model_for(programme, year)
+        # (e.g. ModelRegistry.get). Returns the same column arrays as DecisionStore.cohort(),
+        # ready for cohort.summarize_cohort()
+        table = self.table(MARK_COLUMNS + ['programme', 'year'], programme, year)
+        marks = _marks(table)
+        features = marks[:, [MARK_COLUMNS.index(f) for f in FEATURES]]
+
+        # Integer codes per programme-year: dictionary-encode the programme, then pair with the year
+        encoded = table.column('programme').combine_chunks().dictionary_encode()
+        names = encoded.dictionary.to_pylist() + ['']
+        codes = encoded.indices.fill_null(len(names) - 1).to_numpy().astype(np.int64)
+        years = table.column('year').fill_null(0).to_numpy().astype(np.int64) if table.num_rows \
+            else np.empty(0, dtype=np.int64)
+        # One int64 key per row (years are < 10000), so the grouping is a plain 1-D unique
+        groups, inverse = np.unique(codes * 10_000 + years, return_inverse=True)
+
+        clusters = np.zeros(len(marks), dtype=np.int64)
+        eligible_ai = np.zeros(len(marks), dtype=bool)
+        for g, key in enumerate(groups.tolist()):
+            rows = np.flatnonzero(inverse == g)
+            code, group_year = divmod(key, 10_000)
+            model = model_for(names[code] or None, group_year or None)
+            cluster_eligibility = getattr(model, 'cluster_eligibility', None) or CLUSTER_ELIGIBILITY
+            eligible = np.array([cluster_eligibility.get(i, False) for i in range(model.n_clusters)])
+            clusters[rows] = model.predict(features[rows])
+            eligible_ai[rows] = eligible[clusters[rows]]
+
+        cohort = {c: marks[:, j] for j, c in enumerate(MARK_COLUMNS)}
+        cohort.update(
+            programme=np.array(names, dtype=object)[codes],
+            cluster=clusters,
+            eligible_manual=evaluate_rules(marks)['eligible_manual'],
+            eligible_ai=eligible_ai,
+        )
+        return cohort
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Partitioned Parquet archive of historical marks.")
+    parser.add_argument('--archive', default=ARCHIVE_DIR, help="archive directory (default: %(default)s)")
+    commands = parser.add_subparsers(dest='command', required=True)
+    load = commands.add_parser('ingest', help="add CSV/Parquet mark files to the archive")
+    load.add_argument('inputs', nargs='+', help="files with ass1, ass2, test1, test2 (and optionally reg_no)")
+    load.add_argument('--programme', default=None, help="programme for rows without a programme column")
+    load.add_argument('--year', type=int, default=None, help="academic year for rows without a year column")
+    load.add_argument('--chunksize', type=int, default=100_000, help="rows read per chunk")
+    load.add_argument('--replace', action='store_true', help="replace the year/programme partitions written")
+    commands.add_parser('partitions', help="rows and files per year/programme")
+    summary = commands.add_parser('cohort', help="cohort summary of one or more partitions")
+    summary.add_argument('--programme', default=None, help="programme (default: all)")
+    summary.add_argument('--year', type=int, default=None, help="academic year (default: all)")
+    summary.add_argument('--model', default=None,
+                         help="one model artifact for all partitions (default: each programme-year's registry model)")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    if args.command == 'ingest':
+        rows, rejected = ingest(args.inputs, args.archive, args.programme, args.year, args.chunksize, args.replace)
+        print(f"Archived {rows} rows ({rejected} rejected) in {time.perf_counter() - start:.2f}s",
+              file=sys.stderr)
+        return
+
+    archive = MarksArchive(args.archive)
+    if args.command == 'partitions':
+        print(json.dumps(archive.partitions(), indent=2))
+        return
+
+    from cohort import summarize_cohort
+    if args.model:
+        from artifact import load_model_file
+        model = load_model_file(args.model)
+
+        def model_for(programme, year):
+            return model
+    else:
+        from model_registry import ModelRegistry
+        registry = ModelRegistry()
+        model, model_for = registry.get(), registry.get
+    summary = summarize_cohort(archive.cohort(model_for, args.programme, args.year), model.n_clusters)
+    by_programme = summary['by_programme']
+    print(json.dumps({
+        'students': summary['students'],
+        'eligible_manual': summary['eligible_manual'],
+        'eligible_ai': summary['eligible_ai'],
+        'cluster_counts': summary['cluster_counts'].tolist(),
+        'by_programme': [{'programme': p, 'students': int(n), 'eligible_manual_rate': round(float(m), 4),
+                          'eligible_ai_rate': round(float(a), 4)}
+                         for p, n, m, a in zip(by_programme['programme'], by_programme['students'],
+                                               by_programme['eligible_manual_rate'],
+                                               by_programme['eligible_ai_rate'])],
+    }, indent=2))
+    print(f"Summarized in {time.perf_counter() - start:.2f}s", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
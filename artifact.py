@@ -0,0 +1,214 @@
+"""Compact, memory-mappable model artifact (.cmf).
+
+Replaces unpickling ``kmeans MARKS_model.pkl`` at serve time. One file holds
+the centroids, the precomputed 0.5-grid lookup table, the feature order,
+the cluster name/colour/eligibility mappings and a SHA-256 checksum over
+the header and the data:
+
+    8 bytes   magic b'CMFMARKS'
+    4 bytes   format version (little-endian uint32)
+    4 bytes   header length  (little-endian uint32)
+    header    UTF-8 JSON: metadata + {array name: dtype, shape, offset}
+    data      raw little-endian arrays, each aligned to 64 bytes
+
+Arrays are read with np.memmap, so every worker process on a node shares
+the same page-cache pages instead of holding its own copy.
+
+    python artifact.py convert ["kmeans MARKS_model.pkl"] ["kmeans MARKS_model.cmf"]
+    python artifact.py bench
+"""
+import hashlib
+import json
+import os
+import struct
+import subprocess
+import sys
+
+import numpy as np
+
+from centroids import MODEL_PATH, CENTROIDS_PATH, CentroidModel, load_centroids, model_version
+from lookup import LOOKUP_PATH, LookupModel, build_table, grid_points
+from scoring import FEATURES, CLUSTER_NAMES, CLUSTER_COLORS, CLUSTER_ELIGIBILITY
+
+ARTIFACT_PATH = 'kmeans MARKS_model.cmf'
+MAGIC = b'CMFMARKS'
+FORMAT_VERSION = 2
+ALIGN = 64
+_PREFIX = struct.Struct('<8sII')
+
+
+def _pad(n):
+    return -n % ALIGN
+
+
+def _header_digest(header):
+    # Canonical JSON of everything in the header except the checksum itself
+    fields = {k: v for k, v in header.items() if k != 'checksum'}
+    return hashlib.sha256(json.dumps(fields, sort_keys=True, ensure_ascii=False,
+                                     separators=(',', ':')).encode('utf-8'))
+
+
+def write_artifact(path, arrays, meta):
+    # Lay the arrays out back to back (aligned), then write header + data atomically
+    layout, offset = {}, 0
+    for name, arr in arrays.items():
+        arr = np.ascontiguousarray(arr)
+        layout[name] = {'dtype': arr.dtype.newbyteorder('<').str, 'shape': list(arr.shape), 'offset': offset}
+        offset += arr.nbytes + _pad(arr.nbytes)
+
+    # Round-trip through JSON so the digest sees the header exactly as a reader will
+    header = json.loads(json.dumps(dict(meta, format_version=FORMAT_VERSION, arrays=layout)))
+    digest = _header_digest(header)
+    chunks = []
+    for name, arr in arrays.items():
+        data = np.ascontiguousarray(arr, dtype=layout[name]['dtype']).tobytes()
+        data += b'\0' * _pad(len(data))
+        digest.update(data)
+        chunks.append(data)
+
+    header['checksum'] = 'sha256:' + digest.hexdigest()
+    header_bytes = json.dumps(header, ensure_ascii=False).encode('utf-8')
+    header_bytes += b' ' * _pad(_PREFIX.size + len(header_bytes))
+
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(_PREFIX.pack(MAGIC, FORMAT_VERSION, len(header_bytes)))
+        f.write(header_bytes)
+        for data in chunks:
+            f.write(data)
+    os.replace(tmp, path)
+
+
+def read_artifact(path, verify=True):
+    # Returns (metadata, {name: read-only memmapped array})
+    with open(path, 'rb') as f:
+        magic, version, header_len = _PREFIX.unpack(f.read(_PREFIX.size))
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a model artifact")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"{path} uses format version {version}; this code reads version {FORMAT_VERSION}")
+        meta = json.loads(f.read(header_len).decode('utf-8'))
+
+    data_start = _PREFIX.size + header_len
+    buf = np.memmap(path, dtype=np.uint8, mode='r')
+    if verify:
+        digest = _header_digest(meta)
+        digest.update(buf[data_start:])
+        if 'sha256:' + digest.hexdigest() != meta['checksum']:
+            raise ValueError(f"{path}: checksum mismatch, the artifact is corrupt")
+
+    arrays = {}
+    for name, spec in meta.pop('arrays').items():
+        dtype = np.dtype(spec['dtype'])
+        start = data_start + spec['offset']
+        count = int(np.prod(spec['shape'], dtype=np.int64))
+        arrays[name] = buf[start:start + count * dtype.itemsize].view(dtype).reshape(spec['shape'])
+    return meta, arrays
+
+
+def _int_keys(mapping):
+    return {int(k): v for k, v in mapping.items()}
+
+
+def load_artifact(path=ARTIFACT_PATH, verify=True):
+    meta, arrays = read_artifact(path, verify)
+    if meta['features'] != FEATURES:
+        raise ValueError(f"{path}: feature order {meta['features']} does not match {FEATURES}")
+    centroids = CentroidModel(arrays['cluster_centers'],
+                              cluster_names=_int_keys(meta['cluster_names']),
+                              cluster_colors=_int_keys(meta['cluster_colors']),
+                              cluster_eligibility=_int_keys(meta['cluster_eligibility']))
+    version = model_version(centroids)
+    if meta['model_version'] != version:
+        raise ValueError(f"{path}: model_version does not match the centres and mappings")
+    table = {name: arrays[name] for name in ('cluster', 'distances', 'eligible_ai')}
+    table['model_version'] = np.array(version)
+    return LookupModel(centroids, table=table)
+
+
+def load_model_file(path):
+    # .cmf artifacts are memory-mapped; older .npz centroid exports get a lookup table beside them
+    if path.endswith('.cmf'):
+        return load_artifact(path)
+    lookup_path = LOOKUP_PATH if path == CENTROIDS_PATH else os.path.splitext(path)[0] + '_lookup.npz'
+    return LookupModel(load_centroids(path), lookup_path)
+
+
+def save_artifact(model, path=ARTIFACT_PATH, cluster_names=None, cluster_colors=None,
+                  cluster_eligibility=None):
+    # model: anything with cluster_centers_ (sklearn KMeans or CentroidModel)
+    centroids = CentroidModel(model.cluster_centers_,
+                              cluster_names=cluster_names or CLUSTER_NAMES,
+                              cluster_colors=cluster_colors or CLUSTER_COLORS,
+                              cluster_eligibility=cluster_eligibility or CLUSTER_ELIGIBILITY)
+    table = build_table(centroids)
+    meta = {
+        'model_version': model_version(centroids),
+        'features': FEATURES,
+        'cluster_names': centroids.cluster_names,
+        'cluster_colors': centroids.cluster_colors,
+        'cluster_eligibility': centroids.cluster_eligibility,
+    }
+    arrays = {'cluster_centers': centroids.cluster_centers_,
+              'cluster': table['cluster'],
+              'distances': table['distances'],
+              'eligible_ai': table['eligible_ai']}
+    write_artifact(path, arrays, meta)
+
+
+def convert_pickle(pickle_path=MODEL_PATH, out_path=ARTIFACT_PATH):
+    # Only conversion needs joblib/scikit-learn
+    import joblib
+    kmeans = joblib.load(pickle_path)
+    save_artifact(kmeans, out_path)
+
+    model = load_artifact(out_path)
+    if not np.array_equal(model.predict(grid_points()), kmeans.predict(grid_points())):
+        raise RuntimeError("Artifact disagrees with the KMeans model")
+
+
+_BENCH_CHILD = """
+import resource, sys, time
+def rss_kb():
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * resource.getpagesize() // 1024
+before = rss_kb()
+start = time.perf_counter()
+if sys.argv[1] == 'pickle':
+    import joblib
+    model = joblib.load(sys.argv[2])
+else:
+    from artifact import load_artifact
+    model = load_artifact(sys.argv[2])
+model.predict([[2.5, 7.5, 7.5]])
+print(time.perf_counter() - start, rss_kb() - before)
+"""
+
+
+def bench(pickle_path=MODEL_PATH, artifact_path=ARTIFACT_PATH, runs=5):
+    # Each measurement runs in a fresh interpreter so import costs are included
+    here = os.path.dirname(os.path.abspath(__file__))
+    for kind, path in (('pickle', pickle_path), ('artifact', artifact_path)):
+        times, rss = [], []
+        for _ in range(runs):
+            out = subprocess.run([sys.executable, '-W', 'ignore', '-c', _BENCH_CHILD, kind, path],
+                                 cwd=here, capture_output=True, text=True, check=True)
+            t, kb = out.stdout.split()
+            times.append(float(t))
+            rss.append(int(kb))
+        print(f"{kind:9s} load+first predict: median {sorted(times)[runs // 2] * 1000:7.1f} ms, "
+              f"RSS growth median {sorted(rss)[runs // 2] / 1024:6.1f} MB  "
+              f"(file {os.path.getsize(path)} bytes)")
+
+
+if __name__ == '__main__':
+    command = sys.argv[1] if len(sys.argv) > 1 else 'convert'
+    if command == 'convert':
+        src = sys.argv[2] if len(sys.argv) > 2 else MODEL_PATH
+        dst = sys.argv[3] if len(sys.argv) > 3 else ARTIFACT_PATH
+        convert_pickle(src, dst)
+        print(f"Converted '{src}' to '{dst}'")
+    elif command == 'bench':
+        bench()
+    else:
+        sys.exit(f"unknown command {command!r} (use 'convert' or 'bench')")
@@ -0,0 +1,123 @@
+"""Headless batch scoring for large mark files.
+
+Streams the input CSV in fixed-size chunks, scores the chunks on a process
+pool with the same models and rules as the Streamlit app, and appends the
+results (or writes one shard per chunk) so memory use stays flat. Rows are
+scored with their programme-year's model from the model registry, exactly as
+in the app; the model_version column records which model scored each row.
+
+    python batch_score.py marks.csv results.csv --chunksize 100000 --workers 4
+    python batch_score.py marks.csv results_dir --shard
+    python batch_score.py marks.csv results.csv --academic-year 2025
+    python batch_score.py marks_archive results.csv --programme "Bachelor of Science" --year 2024
+"""
+import argparse
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from artifact import ARTIFACT_PATH
+from model_registry import MODELS_DIR, ModelRegistry
+from scoring import iter_chunks, score_by_programme
+from validation import validate_marks
+
+# Model registry and default year, set up once per worker process
+_registry = None
+_year = None
+
+
+def _init_worker(model_path, models_dir, year):
+    global _registry, _year
+    _registry = ModelRegistry(models_dir, default_path=model_path)
+    _year = year
+
+
+def _score_chunk(chunk):
+    clean, report = validate_marks(chunk)
+    # Empty chunks are scored too, so every chunk (and the header) has the same columns
+    return score_by_programme(_registry.get, clean, _year), report
+
+
+def _write(df, path, header):
+    df.to_csv(path, mode='w' if header else 'a', header=header, index=False)
+
+
+def run(input_path, output_path, model_path=ARTIFACT_PATH, chunksize=100_000,
+        workers=None, shard=False, rejects_path=None, programme=None, year=None,
+        models_dir=MODELS_DIR, academic_year=None):
+    # programme/year select archive partitions; academic_year picks the model for rows
+    # without a year column
+    workers = workers or os.cpu_count() or 1
+    if shard:
+        os.makedirs(output_path, exist_ok=True)
+
+    scored_rows = rejected_rows = 0
+    chunks = iter_chunks(input_path, chunksize, programme, year)
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(model_path, models_dir, academic_year)) as pool:
+        # Keep a bounded number of chunks in flight and write them back in order
+        pending = deque()
+        index = 0
+        wrote_rejects = False
+
+        def drain_one():
+            nonlocal scored_rows, rejected_rows, index, wrote_rejects
+            scored, report = pending.popleft().result()
+            if shard:
+                _write(scored, os.path.join(output_path, f"part-{index:05d}.csv"), True)
+            else:
+                _write(scored, output_path, index == 0)
+            if rejects_path and len(report):
+                _write(report, rejects_path, not wrote_rejects)
+                wrote_rejects = True
+            scored_rows += len(scored)
+            rejected_rows += report['row'].nunique()
+            index += 1
+
+        for chunk in chunks:
+            pending.append(pool.submit(_score_chunk, chunk))
+            if len(pending) >= workers * 2:
+                drain_one()
+        while pending:
+            drain_one()
+
+    return scored_rows, rejected_rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score mark files without the Streamlit app.")
+    parser.add_argument('input', help="CSV or Parquet file with ass1, ass2, test1, test2 columns, or a marks archive directory")
+    parser.add_argument('output', help="output CSV (or directory with --shard)")
+    parser.add_argument('--model', default=ARTIFACT_PATH,
+                        help="default model artifact (.cmf) or centroids (.npz), for programmes "
+                             "without their own model (default: %(default)s)")
+    parser.add_argument('--models-dir', default=MODELS_DIR,
+                        help="per-programme models (default: %(default)s)")
+    parser.add_argument('--academic-year', type=int, default=None,
+                        help="year whose programme models score rows without a year column")
+    parser.add_argument('--chunksize', type=int, default=100_000, help="rows per chunk")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument('--shard', action='store_true', help="write one part-NNNNN.csv per chunk")
+    parser.add_argument('--rejects', default=None,
+                        help="CSV report of rows that failed validation (one line per row/column/issue; "
+                             "duplicate reg_no is checked within each chunk)")
+    parser.add_argument('--programme', action='append', default=None,
+                        help="archive input: only this programme (repeatable; default: all). Each "
+                             "partition is scored with its programme-year model, as in archive.py cohort")
+    parser.add_argument('--year', type=int, action='append', default=None,
+                        help="archive input: only this academic year (repeatable; default: all)")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    scored, rejected = run(args.input, args.output, args.model, args.chunksize,
+                           args.workers, args.shard, args.rejects, args.programme, args.year,
+                           args.models_dir, args.academic_year)
+    elapsed = time.perf_counter() - start
+    print(f"Scored {scored} rows ({rejected} rejected) in {elapsed:.2f}s", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
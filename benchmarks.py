@@ -0,0 +1,225 @@
+"""Local performance benchmarks - no browser needed.
+
+Measures the paths a user waits on: importing Streamlit and the first run
+of Marks.py in a fresh interpreter (cold start), load_model()'s work, one
+full script rerun through Streamlit's AppTest harness, single-student
+scoring, and roster scoring throughput at several sizes. Every benchmark
+takes at least MIN_RUNS runs. Results go to a JSON file and are compared
+against a baseline recorded on the same machine. A benchmark regresses only
+when even its fastest run is slower than the baseline median by more than the
+threshold, and its median moved by more than both a small noise floor and the
+baseline's own spread. A baseline from a different machine or toolchain is
+reported against but never fails the run, so none is committed: record one
+locally before changing anything.
+
+    python benchmarks.py --update-baseline    # record this machine's baseline (bench_baseline.json)
+    python benchmarks.py                      # run, compare, write bench_results.json
+    python benchmarks.py --threshold 0.5      # allow 50% slowdown before failing
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import warnings
+from datetime import datetime
+
+import numpy as np
+
+from artifact import ARTIFACT_PATH, load_model_file
+from microbatch import MicroBatcher
+from model_registry import ModelRegistry
+from scoring import FEATURES, MARK_COLUMNS, MAX_MARKS, MARK_STEP, score_roster
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+APP_PATH = os.path.join(HERE, 'Marks.py')
+BASELINE_PATH = os.path.join(HERE, 'bench_baseline.json')
+RESULTS_PATH = os.path.join(HERE, 'bench_results.json')
+ROSTER_SIZES = (1_000, 10_000, 100_000)
+MIN_RUNS = 3
+# Baseline metadata that has to match for a comparison to gate the run
+MACHINE_KEYS = ('python', 'numpy', 'platform', 'cpus')
+
+_COLD_START_CHILD = """
+import sys, time, warnings
+warnings.simplefilter('ignore')
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+imported = time.perf_counter()
+at = AppTest.from_file(sys.argv[1], default_timeout=120).run()
+if at.exception:
+    sys.exit(at.exception[0].message)
+print(imported - start, time.perf_counter() - imported)
+"""
+
+
+def _timeit(fn, runs, warmup=1):
+    # Returns per-call seconds for `runs` calls (at least MIN_RUNS) after `warmup` untimed ones
+    runs = max(runs, MIN_RUNS)
+    for _ in range(warmup):
+        fn()
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def _summary(times, **extra):
+    times = np.asarray(times)
+    return dict({
+        'median_s': float(np.median(times)),
+        'p95_s': float(np.percentile(times, 95)),
+        'min_s': float(times.min()),
+        'runs': len(times),
+    }, **extra)
+
+
+def random_roster(n, seed=0):
+    import pandas as pd
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({c: rng.integers(0, int(MAX_MARKS[c] / MARK_STEP) + 1, n) * MARK_STEP
+                         for c in MARK_COLUMNS})
+
+
+def bench_cold_start(runs):
+    # Fresh interpreter each time so module imports are really paid for
+    imports, first_runs = [], []
+    for _ in range(max(runs, MIN_RUNS)):
+        out = subprocess.run([sys.executable, '-c', _COLD_START_CHILD, APP_PATH],
+                             cwd=HERE, capture_output=True, text=True, check=True)
+        t_import, t_run = out.stdout.split()
+        imports.append(float(t_import))
+        first_runs.append(float(t_run))
+    return {'import_streamlit': _summary(imports), 'cold_start_first_run': _summary(first_runs)}
+
+
+def bench_load_model(runs):
+    # What Marks.load_model() does on a cold cache: registry load + warm-up predict
+    def load():
+        ModelRegistry().get().predict(np.zeros((1, len(FEATURES))))
+    return {'load_model': _summary(_timeit(load, runs))}
+
+
+def bench_rerun(runs):
+    from streamlit.testing.v1 import AppTest
+    warnings.simplefilter('ignore')
+    at = AppTest.from_file(APP_PATH, default_timeout=120).run()
+    return {'script_rerun': _summary(_timeit(at.run, runs))}
+
+
+def bench_single(runs, model_path=ARTIFACT_PATH):
+    model = load_model_file(model_path)
+    scorer = MicroBatcher(model)
+    return {
+        'predict_single': _summary(_timeit(lambda: model.predict([[2.5, 7.5, 7.5]]), runs)),
+        'score_one': _summary(_timeit(lambda: model.score_one(2.5, 7.5, 7.5), runs)),
+        'microbatch_single': _summary(_timeit(lambda: scorer.score(2.5, 7.5, 7.5), runs)),
+    }
+
+
+def bench_batch(runs, sizes=ROSTER_SIZES, model_path=ARTIFACT_PATH):
+    model = load_model_file(model_path)
+    results = {}
+    for n in sizes:
+        roster = random_roster(n)
+        times = _timeit(lambda: score_roster(model, roster), runs)
+        results[f'score_roster_{n}'] = _summary(times, rows_per_s=float(n / np.median(times)))
+    return results
+
+
+def run_all(quick=False):
+    scale = 1 if quick else 5
+    results = {}
+    results.update(bench_cold_start(runs=MIN_RUNS if quick else 5))
+    results.update(bench_load_model(runs=5 * scale))
+    results.update(bench_rerun(runs=MIN_RUNS * scale))
+    results.update(bench_single(runs=200 * scale))
+    results.update(bench_batch(runs=MIN_RUNS if quick else scale))
+    return {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+        },
+        'benchmarks': results,
+    }
+
+
+def machine_differences(results, baseline):
+    # [(key, baseline value, current value)] for the metadata that makes timings comparable
+    meta, base = results['meta'], baseline.get('meta', {})
+    return [(key, base.get(key), meta.get(key)) for key in MACHINE_KEYS if base.get(key) != meta.get(key)]
+
+
+def compare(results, baseline, threshold, min_delta_s=0.0005):
+    # Returns [(name, baseline median, current median, ratio)] of benchmarks over the threshold.
+    # One slow run cannot trip it: the fastest run has to be slower than the baseline median,
+    # and the median shift has to exceed the noise floor and the baseline's own spread.
+    regressions = []
+    for name, current in results['benchmarks'].items():
+        base = baseline.get('benchmarks', {}).get(name)
+        if base is None:
+            continue
+        ratio = current['median_s'] / base['median_s']
+        spread = base['p95_s'] - base['min_s']
+        if (current['min_s'] > base['median_s'] * (1 + threshold)
+                and current['median_s'] - base['median_s'] > max(min_delta_s, spread)):
+            regressions.append((name, base['median_s'], current['median_s'], ratio))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark startup, rerun, predict and batch paths.")
+    parser.add_argument('--output', default=RESULTS_PATH, help="results JSON (default: %(default)s)")
+    parser.add_argument('--baseline', default=BASELINE_PATH, help="baseline JSON (default: %(default)s)")
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="allowed slowdown of the median vs baseline, as a fraction (default: %(default)s)")
+    parser.add_argument('--min-delta-ms', type=float, default=0.5,
+                        help="ignore slowdowns smaller than this many ms (default: %(default)s)")
+    parser.add_argument('--update-baseline', action='store_true', help="write these results as the baseline")
+    parser.add_argument('--quick', action='store_true', help="fewer repetitions (noisier)")
+    args = parser.parse_args(argv)
+
+    results = run_all(args.quick)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+
+    for name, r in results['benchmarks'].items():
+        extra = f"  {r['rows_per_s']:12,.0f} rows/s" if 'rows_per_s' in r else ""
+        print(f"{name:24s} median {r['median_s'] * 1000:10.3f} ms  p95 {r['p95_s'] * 1000:10.3f} ms{extra}")
+
+    if args.update_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"Wrote baseline {args.baseline}", file=sys.stderr)
+        return
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline} - run with --update-baseline to create one", file=sys.stderr)
+        return
+
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.threshold, args.min_delta_ms / 1000)
+    differences = machine_differences(results, baseline)
+    label = "slower" if differences else "REGRESSION"
+    for name, base, current, ratio in regressions:
+        print(f"{label} {name}: {base * 1000:.3f} ms -> {current * 1000:.3f} ms ({ratio:.2f}x)", file=sys.stderr)
+    if differences:
+        for key, base_value, value in differences:
+            print(f"Baseline {key} {base_value!r} differs from this run's {value!r}", file=sys.stderr)
+        print("Baseline is from another machine or toolchain - not failing; "
+              "record one here with --update-baseline", file=sys.stderr)
+        return
+    if regressions:
+        sys.exit(1)
+    print(f"No regressions beyond {args.threshold:.0%} of baseline", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""Pure-NumPy nearest-centroid scoring engine.
+
+Prediction only needs the KMeans cluster centres, so the app, batch jobs
+and services score with CentroidModel built from the exported centres
+instead of unpickling scikit-learn. To (re)export after retraining:
+
+    python centroids.py "kmeans MARKS_model.pkl" "kmeans MARKS_centroids.npz"
+"""
+import hashlib
+import json
+import sys
+
+import numpy as np
+
+MODEL_PATH = 'kmeans MARKS_model.pkl'
+CENTROIDS_PATH = 'kmeans MARKS_centroids.npz'
+
+
+class CentroidModel:
+    # Drop-in replacement for the parts of sklearn's KMeans the app uses.
+    # The label mappings are optional; None means "use the app defaults".
+
+    def __init__(self, cluster_centers, cluster_names=None, cluster_colors=None,
+                 cluster_eligibility=None):
+        self.cluster_centers_ = np.ascontiguousarray(cluster_centers, dtype=np.float64)
+        self.cluster_names = cluster_names
+        self.cluster_colors = cluster_colors
+        self.cluster_eligibility = cluster_eligibility
+        self.n_clusters, self.n_features_in_ = self.cluster_centers_.shape
+        self._centers_sq = np.einsum('ij,ij->i', self.cluster_centers_, self.cluster_centers_)
+
+    def _check(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != self.n_features_in_:
+            raise ValueError(f"X has {X.shape[1]} features, but the model expects {self.n_features_in_}")
+        return X
+
+    def predict(self, X):
+        # Same formulation as KMeans.predict (||c||^2 - 2 x.c); argmin keeps the
+        # lowest cluster index on ties, exactly like sklearn's strict '<' scan
+        X = self._check(X)
+        scores = self._centers_sq - 2.0 * (X @ self.cluster_centers_.T)
+        return scores.argmin(axis=1).astype(np.int32)
+
+    def transform(self, X):
+        # Euclidean distance to every centre, like KMeans.transform
+        X = self._check(X)
+        diff = X[:, None, :] - self.cluster_centers_[None, :, :]
+        return np.sqrt(np.einsum('ijk,ijk->ij', diff, diff))
+
+    def predict_distances(self, X):
+        # (clusters, distances) from a single distance computation
+        distances = self.transform(X)
+        return distances.argmin(axis=1).astype(np.int32), distances
+
+
+MAPPINGS = ('cluster_names', 'cluster_colors', 'cluster_eligibility')
+
+
+def model_version(model):
+    # Short content hash of the centres and of any label mappings the model carries
+    # (eligibility decides verdicts) - changes whenever either does
+    centers = np.ascontiguousarray(model.cluster_centers_, dtype=np.float64)
+    digest = hashlib.sha256(centers.tobytes())
+    mappings = {name: getattr(model, name, None) for name in MAPPINGS}
+    if any(mapping is not None for mapping in mappings.values()):
+        canonical = {name: None if mapping is None else {str(k): v for k, v in mapping.items()}
+                     for name, mapping in mappings.items()}
+        digest.update(json.dumps(canonical, sort_keys=True, ensure_ascii=False,
+                                 default=lambda value: value.item()).encode('utf-8'))
+    return digest.hexdigest()[:12]
+
+
+def load_centroids(path=CENTROIDS_PATH):
+    with np.load(path) as data:
+        return CentroidModel(data['cluster_centers'])
+
+
+def export_centroids(pickle_path=MODEL_PATH, out_path=CENTROIDS_PATH):
+    # Only the export step needs joblib/scikit-learn
+    import joblib
+    kmeans = joblib.load(pickle_path)
+    np.savez(out_path, cluster_centers=kmeans.cluster_centers_)
+
+    # Verify the engine agrees with KMeans.predict over the whole 0.5-mark grid
+    engine = load_centroids(out_path)
+    grid = np.stack(np.meshgrid(np.arange(0, 5.5, 0.5), np.arange(0, 15.5, 0.5),
+                                np.arange(0, 15.5, 0.5), indexing='ij'), axis=-1).reshape(-1, 3)
+    if not np.array_equal(engine.predict(grid), kmeans.predict(grid)):
+        raise RuntimeError("Exported centroids disagree with the KMeans model")
+    return engine
+
+
+if __name__ == '__main__':
+    src = sys.argv[1] if len(sys.argv) > 1 else MODEL_PATH
+    dst = sys.argv[2] if len(sys.argv) > 2 else CENTROIDS_PATH
+    export_centroids(src, dst)
+    print(f"Exported centroids from '{src}' to '{dst}'")
@@ -0,0 +1,63 @@
+"""Cohort analytics over the stored eligibility decisions.
+
+Everything is aggregated here, server-side, over the full cohort (latest
+decision per student); the page only receives counts. Marks sit on the
+0.5 grid, so the 3-D view is a density plot of occupied (ass1, test1,
+test2) cells - at most 11 x 31 x 31 points however many students there are.
+"""
+import numpy as np
+
+from scoring import FEATURES, MARK_COLUMNS, MAX_MARKS, MARK_STEP
+
+# Grid index of the top mark per column (10 for 5 marks, 30 for 15)
+_TOP_STEP = np.array([int(MAX_MARKS[c] / MARK_STEP) for c in MARK_COLUMNS])
+_FEATURE_IDX = [MARK_COLUMNS.index(f) for f in FEATURES]
+
+
+def mark_steps(cohort):
+    # Marks as grid indices (rounded to the nearest half mark, clipped to range)
+    marks = np.column_stack([np.asarray(cohort[c], dtype=np.float64) for c in MARK_COLUMNS])
+    steps = np.rint(marks / MARK_STEP).astype(np.int64)
+    return np.clip(steps, 0, _TOP_STEP)
+
+
+def summarize_cohort(cohort, n_clusters):
+    # cohort: column arrays as returned by DecisionStore.cohort()
+    steps = mark_steps(cohort)
+    cluster = np.asarray(cohort['cluster'], dtype=np.int64)
+    manual = np.asarray(cohort['eligible_manual'], dtype=bool)
+    ai = np.asarray(cohort['eligible_ai'], dtype=bool)
+    k = max(n_clusters, int(cluster.max()) + 1 if len(cluster) else 0)
+
+    # Eligibility rates by programme - one bincount per measure
+    programmes, inverse = np.unique(np.asarray(cohort['programme'], dtype=str), return_inverse=True)
+    students = np.bincount(inverse, minlength=len(programmes))
+    by_programme = {
+        'programme': programmes.tolist(),
+        'students': students,
+        'eligible_manual_rate': np.bincount(inverse, weights=manual, minlength=len(programmes)) / students,
+        'eligible_ai_rate': np.bincount(inverse, weights=ai, minlength=len(programmes)) / students,
+    }
+
+    # Density cells over the model's three features, coloured by their most common cluster
+    dims = tuple(_TOP_STEP[_FEATURE_IDX] + 1)
+    cell = np.ravel_multi_index(steps[:, _FEATURE_IDX].T, dims)
+    cell_clusters = np.bincount(cell * k + cluster, minlength=int(np.prod(dims)) * k).reshape(-1, k)
+    cell_counts = cell_clusters.sum(axis=1)
+    occupied = np.flatnonzero(cell_counts)
+
+    return {
+        'students': len(cluster),
+        'eligible_manual': int(manual.sum()),
+        'eligible_ai': int(ai.sum()),
+        'cluster_counts': np.bincount(cluster, minlength=k),
+        'histograms': {c: np.bincount(steps[:, j], minlength=_TOP_STEP[j] + 1)
+                       for j, c in enumerate(MARK_COLUMNS)},
+        'total_histogram': np.bincount(steps.sum(axis=1), minlength=_TOP_STEP.sum() + 1),
+        'by_programme': by_programme,
+        'density': {
+            'points': np.column_stack(np.unravel_index(occupied, dims)) * MARK_STEP,
+            'counts': cell_counts[occupied],
+            'cluster': cell_clusters[occupied].argmax(axis=1),
+        },
+    }
@@ -0,0 +1,285 @@
+"""Persistent store of every eligibility decision the app makes.
+
+Decisions go to a local SQLite database indexed on registration number and
+programme. Writes are queued and flushed in batches by a background thread
+so the script thread never waits on disk.
+
+The same database holds the stored roster: one row per student with the
+current marks, a dirty flag set whenever those marks change, and the model
+version that produced the stored verdict. Re-scoring (see rescore.py) reads
+only dirty rows and rows scored by another model version, through partial
+and version indexes, so a handful of corrections costs a handful of rows.
+"""
+import atexit
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+DB_PATH = 'eligibility_decisions.db'
+
+COLUMNS = ['reg_no', 'student_name', 'programme', 'ass1', 'ass2', 'test1', 'test2',
+           'cluster', 'eligible_manual', 'eligible_ai', 'model_version', 'scored_at']
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS decisions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    reg_no TEXT NOT NULL,
+    student_name TEXT,
+    programme TEXT,
+    ass1 REAL, ass2 REAL, test1 REAL, test2 REAL,
+    cluster INTEGER,
+    eligible_manual INTEGER,
+    eligible_ai INTEGER,
+    model_version TEXT,
+    scored_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_decisions_reg_no ON decisions (reg_no, id);
+CREATE INDEX IF NOT EXISTS idx_decisions_programme ON decisions (programme, reg_no);
+
+CREATE TABLE IF NOT EXISTS roster (
+    reg_no TEXT PRIMARY KEY,
+    student_name TEXT,
+    programme TEXT NOT NULL DEFAULT '',
+    year INTEGER NOT NULL DEFAULT 0,
+    ass1 REAL, ass2 REAL, test1 REAL, test2 REAL,
+    revision INTEGER NOT NULL DEFAULT 1,
+    dirty INTEGER NOT NULL DEFAULT 1,
+    updated_at TEXT,
+    cluster INTEGER,
+    eligible_manual INTEGER,
+    eligible_ai INTEGER,
+    confidence REAL,
+    model_version TEXT,
+    scored_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_roster_dirty ON roster (programme, year) WHERE dirty = 1;
+CREATE INDEX IF NOT EXISTS idx_roster_model ON roster (programme, year, model_version);
+CREATE TABLE IF NOT EXISTS roster_groups (
+    programme TEXT NOT NULL,
+    year INTEGER NOT NULL,
+    PRIMARY KEY (programme, year)
+);
+"""
+
+# Stored roster: marks as entered (year 0 = not year-specific, programme '' = default model)
+ROSTER_MARKS = ['reg_no', 'student_name', 'programme', 'year', 'ass1', 'ass2', 'test1', 'test2']
+ROSTER_VERDICT = ['cluster', 'eligible_manual', 'eligible_ai', 'confidence', 'model_version', 'scored_at']
+
+# Only a row that actually changed becomes dirty; re-importing identical rows touches nothing
+_UPSERT_ROSTER = f"""
+    INSERT INTO roster ({', '.join(ROSTER_MARKS)}, updated_at) VALUES ({', '.join('?' * (len(ROSTER_MARKS) + 1))})
+    ON CONFLICT (reg_no) DO UPDATE SET
+        student_name = excluded.student_name,
+        programme = excluded.programme,
+        year = excluded.year,
+        ass1 = excluded.ass1, ass2 = excluded.ass2, test1 = excluded.test1, test2 = excluded.test2,
+        revision = revision + 1,
+        dirty = 1,
+        updated_at = excluded.updated_at
+    WHERE (student_name, programme, year, ass1, ass2, test1, test2)
+          IS NOT (excluded.student_name, excluded.programme, excluded.year,
+                  excluded.ass1, excluded.ass2, excluded.test1, excluded.test2)
+"""
+
+
+class DecisionStore:
+
+    def __init__(self, path=DB_PATH, batch_size=200, flush_interval=1.0):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue()
+        self._failed_writes = 0
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+        finally:
+            conn.close()
+        self._writer = threading.Thread(target=self._run, name="decision-writer", daemon=True)
+        self._writer.start()
+        # The writer is a daemon thread - write whatever is still queued at interpreter exit
+        atexit.register(self.flush)
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def record(self, reg_no, student_name, programme, ass1, ass2, test1, test2,
+               cluster, eligible_manual, eligible_ai, model_version, scored_at=None):
+        # Non-blocking: the row is written by the background thread
+        scored_at = scored_at or datetime.now().isoformat(timespec='seconds')
+        self._queue.put((reg_no, student_name, programme, float(ass1), float(ass2),
+                         float(test1), float(test2), int(cluster), int(bool(eligible_manual)),
+                         int(bool(eligible_ai)), model_version, scored_at))
+
+    def flush(self):
+        # Block until everything queued so far is on disk
+        self._queue.join()
+
+    def pending(self):
+        return self._queue.qsize()
+
+    def _run(self):
+        conn = self._connect()
+        insert = f"INSERT INTO decisions ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})"
+        while True:
+            # A batch is written flush_interval after its first record at the latest,
+            # however steadily records keep arriving
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                with conn:
+                    conn.executemany(insert, batch)
+            except sqlite3.Error:
+                self._failed_writes += len(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _query(self, sql, params=()):
+        conn = self._connect()
+        try:
+            conn.row_factory = sqlite3.Row
+            return [dict(row) for row in conn.execute(sql, params)]
+        finally:
+            conn.close()
+
+    def history(self, reg_no):
+        return self._query(
+            f"SELECT {', '.join(COLUMNS)} FROM decisions WHERE reg_no = ? ORDER BY id DESC", (reg_no,))
+
+    def latest(self, reg_no):
+        rows = self._query(
+            f"SELECT {', '.join(COLUMNS)} FROM decisions WHERE reg_no = ? ORDER BY id DESC LIMIT 1", (reg_no,))
+        return rows[0] if rows else None
+
+    def eligible_students(self, programme):
+        # Latest decision per student in the programme, eligible under both verdicts
+        return self._query(f"""
+            SELECT {', '.join(COLUMNS)} FROM decisions d
+            WHERE programme = ?
+              AND id = (SELECT MAX(id) FROM decisions WHERE reg_no = d.reg_no)
+              AND eligible_manual = 1 AND eligible_ai = 1
+            ORDER BY reg_no
+        """, (programme,))
+
+    def cohort(self):
+        # Latest decision per student as column arrays, for cohort-wide aggregation.
+        # Rows are unpacked column-wise rather than into per-row dicts.
+        import numpy as np
+        conn = self._connect()
+        try:
+            rows = conn.execute("""
+                SELECT COALESCE(programme, ''), ass1, ass2, test1, test2,
+                       cluster, eligible_manual, eligible_ai
+                FROM decisions
+                WHERE id IN (SELECT MAX(id) FROM decisions GROUP BY reg_no)
+            """).fetchall()
+        finally:
+            conn.close()
+        names = ['programme', 'ass1', 'ass2', 'test1', 'test2', 'cluster', 'eligible_manual', 'eligible_ai']
+        dtypes = [object, np.float64, np.float64, np.float64, np.float64, np.int64, bool, bool]
+        columns = zip(*rows) if rows else [()] * len(names)
+        return {name: np.array(col, dtype=dtype) for name, dtype, col in zip(names, dtypes, columns)}
+
+    # --- stored roster --------------------------------------------------------
+    # Staff-side batch operations: synchronous, one transaction per call.
+
+    def upsert_roster(self, rows):
+        # rows: tuples in ROSTER_MARKS order. Returns how many rows were inserted or changed.
+        now = datetime.now().isoformat(timespec='seconds')
+        rows = [(str(reg_no), student_name, programme or '', int(year or 0),
+                 float(ass1), float(ass2), float(test1), float(test2), now)
+                for reg_no, student_name, programme, year, ass1, ass2, test1, test2 in rows]
+        conn = self._connect()
+        try:
+            with conn:
+                before = conn.total_changes
+                conn.executemany(_UPSERT_ROSTER, rows)
+                changed = conn.total_changes - before
+                conn.executemany("INSERT OR IGNORE INTO roster_groups (programme, year) VALUES (?, ?)",
+                                 {(row[2], row[3]) for row in rows})
+        finally:
+            conn.close()
+        return changed
+
+    def roster_groups(self):
+        # (programme, year) pairs present in the roster - one model applies to each
+        conn = self._connect()
+        try:
+            return conn.execute("SELECT programme, year FROM roster_groups ORDER BY programme, year").fetchall()
+        finally:
+            conn.close()
+
+    def roster_pending(self, programme, year, model_version):
+        # Rows of one group needing a verdict: dirty, or scored by any other model version.
+        # Two range scans either side of the current version, so up-to-date rows are never read.
+        columns = ', '.join(ROSTER_MARKS + ['revision'])
+        conn = self._connect()
+        try:
+            return conn.execute(f"""
+                SELECT {columns} FROM roster WHERE programme = ? AND year = ? AND dirty = 1
+                UNION ALL
+                SELECT {columns} FROM roster WHERE programme = ? AND year = ? AND dirty = 0
+                   AND (model_version < ? OR model_version > ?)
+            """, (programme, year, programme, year, model_version, model_version)).fetchall()
+        finally:
+            conn.close()
+
+    def save_roster_scores(self, rows):
+        # rows: tuples of ROSTER_MARKS + [revision] + ROSTER_VERDICT. Stores each verdict on the
+        # roster and appends it to the decision history (so lookups and cohort views see it).
+        # A row whose marks changed again since it was read keeps its dirty flag and gets
+        # no history entry - its verdict is for marks that are no longer current.
+        n = len(ROSTER_MARKS)
+        update = f"""
+            UPDATE roster SET {', '.join(f'{c} = ?' for c in ROSTER_VERDICT)}, dirty = 0
+            WHERE reg_no = ? AND revision = ?
+        """
+        # Copied from the roster row, and only where the update above applied
+        insert = f"""
+            INSERT INTO decisions ({', '.join(COLUMNS)})
+            SELECT {', '.join("NULLIF(programme, '')" if c == 'programme' else c for c in COLUMNS)} FROM roster
+            WHERE reg_no = ? AND revision = ? AND dirty = 0
+        """
+        keys = [(row[0], row[n]) for row in rows]
+        conn = self._connect()
+        try:
+            with conn:
+                before = conn.total_changes
+                conn.executemany(update, (row[n + 1:] + key for row, key in zip(rows, keys)))
+                saved = conn.total_changes - before
+                conn.executemany(insert, keys)
+        finally:
+            conn.close()
+        return saved
+
+    def roster_stats(self):
+        rows = self._query("""
+            SELECT (SELECT COUNT(*) FROM roster) AS students,
+                   (SELECT COUNT(*) FROM roster INDEXED BY idx_roster_dirty WHERE dirty = 1) AS dirty
+        """)[0]
+        versions = self._query("""
+            SELECT programme, year, model_version, COUNT(*) AS students FROM roster
+            WHERE dirty = 0 GROUP BY programme, year, model_version ORDER BY programme, year
+        """)
+        return dict(rows, scored_by=versions)
+
+    def stats(self):
+        # MAX(id) instead of COUNT(*) so this stays O(1) on a large table
+        records = self._query("SELECT MAX(id) AS n FROM decisions")[0]['n'] or 0
+        return {
+            "records": records,
+            "pending_writes": self.pending(),
+            "failed_writes": self._failed_writes,
+        }
@@ -0,0 +1,332 @@
+"""Concurrent-session load test for the Streamlit app.
+
+Starts ``streamlit run Marks.py`` (or targets a running server), then opens
+N simulated browser sessions over Streamlit's websocket protocol. Each
+session fills in name and registration number, edits the four marks and
+presses the eligibility button with random think times, exactly as the
+browser does: widget changes are sent as rerun requests (fragment reruns
+for widgets inside fragments). Latency is measured from sending the rerun
+to the server's script-finished message. For each N the report gives
+p50/p95/p99 rerun latency, reruns per second, and the server's CPU and
+peak RSS (sampled from /proc - Linux only).
+
+A started server saves its decisions to a scratch database that is deleted
+afterwards. With --url the target server records every simulated "Load
+Student" submission in its own decision store - point it at a disposable
+server (e.g. EXAM_DECISIONS_DB=/tmp/scratch.db), never a live one.
+
+    python loadtest.py --sessions 1 5 10 25 --duration 30
+    python loadtest.py --url http://127.0.0.1:8501 --pid 12345 --sessions 10
+"""
+import argparse
+import asyncio
+import base64
+import json
+import os
+import random
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from urllib.parse import urlparse
+
+import numpy as np
+
+from scoring import MARK_COLUMNS, MAX_MARKS, MARK_STEP
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+APP_PATH = os.path.join(HERE, 'Marks.py')
+
+
+class WebSocket:
+    # Minimal RFC 6455 client over asyncio streams: binary messages, masking, ping/pong
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def connect(cls, host, port, path, subprotocols=()):
+        reader, writer = await asyncio.open_connection(host, port, limit=2 ** 24)
+        key = base64.b64encode(os.urandom(16)).decode()
+        lines = [f"GET {path} HTTP/1.1", f"Host: {host}:{port}", "Upgrade: websocket",
+                 "Connection: Upgrade", f"Sec-WebSocket-Key: {key}", "Sec-WebSocket-Version: 13"]
+        if subprotocols:
+            lines.append(f"Sec-WebSocket-Protocol: {', '.join(subprotocols)}")
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode())
+        status = (await reader.readuntil(b'\r\n\r\n')).split(b'\r\n', 1)[0].decode()
+        if ' 101 ' not in status:
+            raise ConnectionError(f"websocket upgrade refused: {status}")
+        return cls(reader, writer)
+
+    def _frame(self, opcode, payload):
+        mask = os.urandom(4)
+        n = len(payload)
+        if n < 126:
+            head = struct.pack('!BB', 0x80 | opcode, 0x80 | n)
+        elif n < 1 << 16:
+            head = struct.pack('!BBH', 0x80 | opcode, 0x80 | 126, n)
+        else:
+            head = struct.pack('!BBQ', 0x80 | opcode, 0x80 | 127, n)
+        masked = (np.frombuffer(payload, dtype=np.uint8)
+                  ^ np.resize(np.frombuffer(mask, dtype=np.uint8), n)).tobytes()
+        return head + mask + masked
+
+    async def send(self, payload):
+        self.writer.write(self._frame(0x2, payload))
+        await self.writer.drain()
+
+    async def recv(self):
+        # Returns the next complete data message (fragments joined); None once closed
+        parts = []
+        while True:
+            b1, b2 = await self.reader.readexactly(2)
+            n = b2 & 0x7F
+            if n == 126:
+                n = struct.unpack('!H', await self.reader.readexactly(2))[0]
+            elif n == 127:
+                n = struct.unpack('!Q', await self.reader.readexactly(8))[0]
+            payload = await self.reader.readexactly(n)
+            opcode = b1 & 0x0F
+            if opcode == 0x8:
+                return None
+            if opcode == 0x9:
+                self.writer.write(self._frame(0xA, payload))
+                continue
+            if opcode == 0xA:
+                continue
+            parts.append(payload)
+            if b1 & 0x80:
+                return b''.join(parts)
+
+    async def close(self):
+        try:
+            self.writer.write(self._frame(0x8, b''))
+            await self.writer.drain()
+        except ConnectionError:
+            pass
+        self.writer.close()
+
+
+class Session:
+    # One simulated browser tab
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.widgets = {}   # user key -> (widget id, fragment id or "")
+        self.states = {}    # widget id -> WidgetState
+        self.ws = None
+
+    async def open(self):
+        self.ws = await WebSocket.connect(self.host, self.port, '/_stcore/stream', ['streamlit'])
+        return await self.rerun()
+
+    async def rerun(self, fragment_id='', trigger=None):
+        # Send the current widget states (plus a one-shot trigger) and wait for the run to finish
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+        msg = BackMsg()
+        msg.rerun_script.query_string = ''
+        msg.rerun_script.fragment_id = fragment_id
+        for state in self.states.values():
+            msg.rerun_script.widget_states.widgets.append(state)
+        if trigger is not None:
+            button = msg.rerun_script.widget_states.widgets.add()
+            button.id = trigger
+            button.trigger_value = True
+
+        start = time.perf_counter()
+        await self.ws.send(msg.SerializeToString())
+        while True:
+            data = await self.ws.recv()
+            if data is None:
+                raise ConnectionError("server closed the session")
+            fwd = ForwardMsg()
+            fwd.ParseFromString(data)
+            kind = fwd.WhichOneof('type')
+            if kind == 'delta':
+                self._note_widget(fwd.delta)
+            elif kind == 'script_finished' and fwd.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                return time.perf_counter() - start
+
+    def _note_widget(self, delta):
+        if delta.WhichOneof('type') != 'new_element':
+            return
+        element = delta.new_element
+        widget = getattr(element, element.WhichOneof('type') or '', None)
+        widget_id = getattr(widget, 'id', '')
+        if widget_id.startswith('$$ID-'):
+            # Keyed widget ids end with "-<key>"
+            self.widgets.setdefault(widget_id.rsplit('-', 1)[-1], (widget_id, delta.fragment_id))
+
+    async def set(self, key, **value):
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+        widget_id, fragment_id = self.widgets[key]
+        state = WidgetState(id=widget_id, **value)
+        self.states[widget_id] = state
+        return await self.rerun(fragment_id)
+
+    async def click(self, key):
+        widget_id, fragment_id = self.widgets[key]
+        return await self.rerun(fragment_id, trigger=widget_id)
+
+    async def close(self):
+        if self.ws is not None:
+            await self.ws.close()
+
+
+def _random_mark(col):
+    return float(random.randint(0, int(MAX_MARKS[col] / MARK_STEP)) * MARK_STEP)
+
+
+async def run_session(host, port, n, deadline, think, latencies, errors):
+    # One student: open the page, fill details, enter marks and check, repeat until the deadline
+    session = Session(host, port)
+    try:
+        latencies['page_load'].append(await session.open())
+        await asyncio.sleep(random.expovariate(1 / think))
+        latencies['name'].append(await session.set('name', string_value=f"Load Student {n}"))
+        latencies['reg'].append(await session.set('reg', string_value=f"LT{os.getpid()}-{n:05d}"))
+        while time.monotonic() < deadline:
+            for col in MARK_COLUMNS:
+                await asyncio.sleep(random.expovariate(1 / think))
+                latencies['mark'].append(await session.set(col, double_value=_random_mark(col)))
+            await asyncio.sleep(random.expovariate(1 / think))
+            latencies['check'].append(await session.click('check_eligibility'))
+    except (ConnectionError, asyncio.IncompleteReadError, KeyError) as e:
+        errors.append(repr(e))
+    finally:
+        await session.close()
+
+
+def _proc_sample(pid):
+    # (cpu seconds, rss bytes) of a process from /proc
+    with open(f'/proc/{pid}/stat') as f:
+        fields = f.read().rsplit(')', 1)[1].split()
+    cpu = (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK')
+    with open(f'/proc/{pid}/statm') as f:
+        rss = int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    return cpu, rss
+
+
+async def _sample_server(pid, samples, stop):
+    while not stop.is_set():
+        try:
+            samples.append((time.monotonic(),) + _proc_sample(pid))
+        except (OSError, IndexError):
+            return
+        await asyncio.sleep(0.5)
+
+
+async def run_level(host, port, sessions, duration, think, pid=None):
+    latencies = {k: [] for k in ('page_load', 'name', 'reg', 'mark', 'check')}
+    errors, samples = [], []
+    stop = asyncio.Event()
+    sampler = asyncio.create_task(_sample_server(pid, samples, stop)) if pid else None
+
+    start = time.monotonic()
+    deadline = start + duration
+    await asyncio.gather(*[run_session(host, port, i, deadline, think, latencies, errors)
+                           for i in range(sessions)])
+    elapsed = time.monotonic() - start
+    stop.set()
+    if sampler:
+        await sampler
+
+    reruns = np.array([t for values in latencies.values() for t in values])
+    result = {
+        'sessions': sessions,
+        'elapsed_s': round(elapsed, 2),
+        'reruns': len(reruns),
+        'reruns_per_s': round(len(reruns) / elapsed, 2),
+        'errors': len(errors),
+    }
+    if len(reruns):
+        q = np.percentile(reruns, [50, 95, 99]) * 1000
+        result.update(p50_ms=round(q[0], 1), p95_ms=round(q[1], 1), p99_ms=round(q[2], 1))
+    result['by_action_p95_ms'] = {k: round(float(np.percentile(v, 95)) * 1000, 1)
+                                  for k, v in latencies.items() if v}
+    if len(samples) > 1:
+        (t0, cpu0, _), (t1, cpu1, _) = samples[0], samples[-1]
+        result['server_cpu_pct'] = round((cpu1 - cpu0) / (t1 - t0) * 100, 1)
+        result['server_rss_peak_mb'] = round(max(s[2] for s in samples) / 2 ** 20, 1)
+    if errors:
+        result['first_error'] = errors[0]
+    return result
+
+
+def start_server(port, env=None):
+    cmd = [sys.executable, '-m', 'streamlit', 'run', APP_PATH, '--server.headless', 'true',
+           '--server.port', str(port), '--browser.gatherUsageStats', 'false']
+    proc = subprocess.Popen(cmd, cwd=HERE, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    health = f"http://127.0.0.1:{port}/_stcore/health"
+    for _ in range(120):
+        try:
+            with urllib.request.urlopen(health, timeout=1):
+                return proc
+        except OSError:
+            if proc.poll() is not None:
+                raise RuntimeError("streamlit exited during startup")
+            time.sleep(0.5)
+    proc.terminate()
+    raise RuntimeError("streamlit did not become healthy within 60s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate concurrent student sessions against Marks.py.")
+    parser.add_argument('--sessions', type=int, nargs='+', default=[1, 5, 10, 25],
+                        help="concurrent session counts to run, one level after another")
+    parser.add_argument('--duration', type=float, default=30, help="seconds per level (default: %(default)s)")
+    parser.add_argument('--think', type=float, default=1.0,
+                        help="mean think time between actions in seconds (default: %(default)s)")
+    parser.add_argument('--url', default=None,
+                        help="use an already running server instead of starting one "
+                             "(its decision store receives the simulated submissions)")
+    parser.add_argument('--pid', type=int, default=None, help="server PID to sample CPU/memory (with --url)")
+    parser.add_argument('--port', type=int, default=8599, help="port for the started server (default: %(default)s)")
+    parser.add_argument('--output', default=None, help="write the results as JSON")
+    args = parser.parse_args(argv)
+
+    proc = scratch = None
+    if args.url:
+        url = urlparse(args.url)
+        host, port, pid = url.hostname, url.port or 80, args.pid
+        print("Note: simulated submissions are saved in the target server's decision store", file=sys.stderr)
+    else:
+        # Simulated students must not end up in the real eligibility_decisions.db
+        scratch = tempfile.TemporaryDirectory(prefix='loadtest-')
+        env = dict(os.environ, EXAM_DECISIONS_DB=os.path.join(scratch.name, 'decisions.db'))
+        try:
+            proc = start_server(args.port, env)
+        except BaseException:
+            scratch.cleanup()
+            raise
+        host, port, pid = '127.0.0.1', args.port, proc.pid
+
+    results = []
+    try:
+        for n in args.sessions:
+            result = asyncio.run(run_level(host, port, n, args.duration, args.think, pid))
+            results.append(result)
+            print(f"{n:4d} sessions: p50 {result.get('p50_ms', 0):8.1f} ms  p95 {result.get('p95_ms', 0):8.1f} ms  "
+                  f"p99 {result.get('p99_ms', 0):8.1f} ms  {result['reruns_per_s']:7.1f} reruns/s  "
+                  f"CPU {result.get('server_cpu_pct', float('nan')):6.1f}%  "
+                  f"RSS {result.get('server_rss_peak_mb', float('nan')):7.1f} MB  errors {result['errors']}")
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
+        if scratch is not None:
+            scratch.cleanup()
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
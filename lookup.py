@@ -0,0 +1,205 @@
+"""Precomputed predictions over the 0.5-mark input grid.
+
+The inputs are bounded and step in 0.5 marks, so ass1 x test1 x test2 has
+only 11 x 31 x 31 possible values. Every cluster assignment, distance
+vector and AI verdict is computed once, saved next to the model and keyed
+to the model version; on-grid inputs then become array lookups and only
+off-grid rows fall back to computing distances.
+
+The same grid (plus ass2) gives the "marks needed" index: for every
+possible set of marks, the smallest raise of each single component that
+makes the student eligible under both the pass mark and the cluster verdict,
+and the smallest total raise when marks may go up in any components.
+"""
+import os
+import zipfile
+
+import numpy as np
+
+from centroids import model_version
+from scoring import (FEATURES, MARK_COLUMNS, MAX_MARKS, MARK_STEP, PASS_MARK,
+                     CLUSTER_NAMES, CLUSTER_COLORS, CLUSTER_ELIGIBILITY)
+
+LOOKUP_PATH = 'kmeans MARKS_lookup.npz'
+GRID_STEP = MARK_STEP
+GRID_SHAPE = tuple(int(MAX_MARKS[f] / GRID_STEP) + 1 for f in FEATURES)
+MARKS_GRID_SHAPE = tuple(int(MAX_MARKS[c] / GRID_STEP) + 1 for c in MARK_COLUMNS)
+NEEDED_COLUMNS = MARK_COLUMNS + ['combined']
+
+
+def grid_points():
+    axes = [np.arange(n) * GRID_STEP for n in GRID_SHAPE]
+    return np.stack(np.meshgrid(*axes, indexing='ij'), axis=-1).reshape(-1, len(FEATURES))
+
+
+def build_table(model):
+    points = grid_points()
+    clusters = np.asarray(model.predict(points))
+    mapping = getattr(model, 'cluster_eligibility', None) or CLUSTER_ELIGIBILITY
+    eligible = np.array([mapping.get(i, False) for i in range(model.n_clusters)])
+    return {
+        'model_version': np.array(model_version(model)),
+        'cluster': clusters.astype(np.int8).reshape(GRID_SHAPE),
+        'distances': model.transform(points).reshape(GRID_SHAPE + (model.n_clusters,)),
+        'eligible_ai': eligible[clusters].reshape(GRID_SHAPE),
+    }
+
+
+def build_needed_index(eligible_ai):
+    # eligible_ai: AI verdict over the feature grid. Returns int8 grid steps of shape
+    # MARKS_GRID_SHAPE + (NEEDED_COLUMNS,): the smallest raise of each one component
+    # that passes both verdicts, then the smallest total raise over any components;
+    # -1 where that can never get there.
+    eligible_ai = np.asarray(eligible_ai, dtype=bool)
+    steps = np.indices(MARKS_GRID_SHAPE)
+    top = np.array(MARKS_GRID_SHAPE) - 1
+    # Half-mark steps still missing to reach the pass mark
+    pass_steps = int(PASS_MARK / GRID_STEP)
+    total = steps.sum(axis=0)
+    short = np.maximum(pass_steps - total, 0)
+    feature_steps = [steps[MARK_COLUMNS.index(f)] for f in FEATURES]
+
+    needed = np.full(MARKS_GRID_SHAPE + (len(NEEDED_COLUMNS),), -1, dtype=np.int8)
+    for j, col in enumerate(MARK_COLUMNS):
+        start = steps[j] + short
+        reachable = start <= top[j]
+        if col not in FEATURES:
+            # Does not move the cluster: only the pass mark can change
+            ok = reachable & eligible_ai[tuple(feature_steps)]
+            needed[..., j] = np.where(ok, short, -1)
+            continue
+        # First eligible cell at or after each position along this axis (n = none)
+        axis = FEATURES.index(col)
+        n = GRID_SHAPE[axis]
+        position = np.arange(n).reshape([-1 if a == axis else 1 for a in range(len(FEATURES))])
+        first = np.where(eligible_ai, position, n)
+        first = np.flip(np.minimum.accumulate(np.flip(first, axis), axis=axis), axis)
+        cells = list(feature_steps)
+        cells[axis] = np.minimum(start, top[j])
+        target = first[tuple(cells)]
+        needed[..., j] = np.where(reachable & (target < n), target - steps[j], -1)
+
+    # Any split: lowest total among eligible cells at or above these marks in every
+    # component - a reverse running minimum along each axis in turn
+    unreachable = np.iinfo(np.int16).max
+    best = np.where(eligible_ai[tuple(feature_steps)] & (total >= pass_steps), total, unreachable)
+    for axis in range(len(MARK_COLUMNS)):
+        best = np.flip(np.minimum.accumulate(np.flip(best, axis), axis=axis), axis)
+    needed[..., -1] = np.where(best < unreachable, best - total, -1)
+    return needed
+
+
+def load_table(model, path=LOOKUP_PATH):
+    # Reuse the saved table only if it was built from this exact model
+    version = model_version(model)
+    try:
+        with np.load(path) as data:
+            if str(data['model_version']) == version:
+                return {k: data[k] for k in data.files}
+    except (OSError, KeyError, ValueError, zipfile.BadZipFile):
+        pass
+
+    table = build_table(model)
+    try:
+        # Write then rename so concurrent workers never read a half-written table
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'wb') as f:
+            np.savez(f, **table)
+        os.replace(tmp, path)
+    except OSError:
+        pass  # read-only deployment - keep the in-memory table
+    return table
+
+
+class LookupModel:
+    # Wraps a centroid model; answers on-grid inputs from the precomputed table.
+    # table: an already-built table (e.g. memory-mapped from a model artifact)
+
+    def __init__(self, model, path=LOOKUP_PATH, table=None):
+        self.model = model
+        self.cluster_centers_ = model.cluster_centers_
+        self.n_clusters = model.n_clusters
+        self.n_features_in_ = model.n_features_in_
+        self.version = model_version(model)
+        self.cluster_names = getattr(model, 'cluster_names', None) or CLUSTER_NAMES
+        self.cluster_colors = getattr(model, 'cluster_colors', None) or CLUSTER_COLORS
+        self.cluster_eligibility = getattr(model, 'cluster_eligibility', None) or CLUSTER_ELIGIBILITY
+        if table is None or str(table['model_version']) != self.version:
+            table = load_table(model, path)
+        self.table = table
+        self._eligible = np.array([self.cluster_eligibility.get(i, False) for i in range(model.n_clusters)])
+        self._needed = None  # built from the table on first what-if query
+
+        # Flat views so a lookup is a single np.take
+        n_cells = int(np.prod(GRID_SHAPE))
+        self._flat = {k: v.reshape((n_cells,) + v.shape[len(GRID_SHAPE):])
+                      for k, v in self.table.items() if k != 'model_version'}
+
+    def _grid_index(self, X):
+        # Returns (X as float array, flat grid index, mask of rows that are on the grid)
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        steps = X / GRID_STEP
+        idx = np.rint(steps)
+        on_grid = ((idx == steps) & (idx >= 0) & (idx < GRID_SHAPE)).all(axis=1)
+        if not on_grid.all():
+            idx[~on_grid] = 0
+        idx = idx.astype(np.intp)
+        flat = (idx[:, 0] * GRID_SHAPE[1] + idx[:, 1]) * GRID_SHAPE[2] + idx[:, 2]
+        return X, flat, on_grid
+
+    def _lookup(self, name, X, fallback):
+        X, flat, on_grid = self._grid_index(X)
+        out = np.take(self._flat[name], flat, axis=0)
+        if not on_grid.all():
+            out[~on_grid] = fallback(X[~on_grid])
+        return out
+
+    def score_one(self, ass1, test1, test2):
+        # Single-student fast path: plain index arithmetic, no array setup
+        steps = (ass1 / GRID_STEP, test1 / GRID_STEP, test2 / GRID_STEP)
+        if all(float(s).is_integer() and 0 <= s < n for s, n in zip(steps, GRID_SHAPE)):
+            cell = (int(steps[0]) * GRID_SHAPE[1] + int(steps[1])) * GRID_SHAPE[2] + int(steps[2])
+            return int(self._flat['cluster'][cell]), self._flat['distances'][cell]
+        x = np.array([[ass1, test1, test2]], dtype=np.float64)
+        return int(self.model.predict(x)[0]), self.model.transform(x)[0]
+
+    def predict(self, X):
+        return self._lookup('cluster', X, self.model.predict).astype(np.int32)
+
+    def transform(self, X):
+        return self._lookup('distances', X, self.model.transform)
+
+    def predict_distances(self, X):
+        # (clusters, distances) from one grid-index pass. Off-grid rows get one distance
+        # computation and take its argmin as their cluster.
+        X, flat, on_grid = self._grid_index(X)
+        clusters = np.take(self._flat['cluster'], flat).astype(np.int32)
+        distances = np.take(self._flat['distances'], flat, axis=0)
+        if not on_grid.all():
+            rest = self.model.transform(X[~on_grid])
+            distances[~on_grid] = rest
+            clusters[~on_grid] = rest.argmin(axis=1)
+        return clusters, distances
+
+    def eligible_ai(self, X):
+        return self._lookup('eligible_ai', X, lambda rest: self._eligible[self.model.predict(rest)])
+
+    def marks_needed(self, marks):
+        # marks: (n, 4) in MARK_COLUMNS order -> (n, 5) smallest raise per NEEDED_COLUMNS
+        # (0 if already eligible, NaN if it cannot get there or the marks are off the
+        # half-mark grid)
+        if self._needed is None:
+            needed = build_needed_index(self.table['eligible_ai'])
+            self._needed = needed.reshape(-1, len(NEEDED_COLUMNS))
+        marks = np.asarray(marks, dtype=np.float64).reshape(-1, len(MARK_COLUMNS))
+        steps = marks / GRID_STEP
+        idx = np.rint(steps)
+        on_grid = ((idx == steps) & (idx >= 0) & (idx < MARKS_GRID_SHAPE)).all(axis=1)
+        idx[~on_grid] = 0
+        flat = np.ravel_multi_index(idx.astype(np.intp).T, MARKS_GRID_SHAPE)
+        out = np.take(self._needed, flat, axis=0).astype(np.float64)
+        out[out < 0] = np.nan
+        out[~on_grid] = np.nan
+        return out * GRID_STEP
@@ -0,0 +1,92 @@
+"""Process-wide micro-batching scorer shared by all Streamlit sessions.
+
+Each session's script thread submits its marks and waits; a single
+background worker takes every request already queued and scores them with
+one vectorized predict/transform call. It never waits for more to arrive:
+a lone request is scored at once, and requests that come in while a batch
+is being scored form the next batch.
+"""
+import queue
+import threading
+from concurrent.futures import Future
+
+import numpy as np
+
+from timing import Timings
+
+
+class MicroBatcher:
+
+    def __init__(self, model, max_batch=256, timings=None):
+        self.model = model
+        self.timings = timings or Timings(enabled=False)
+        self.max_batch = max_batch
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._batches = 0
+        self._max_batch_seen = 0
+        self._last_batch = 0
+        self._worker = threading.Thread(target=self._run, name="micro-batch-scorer", daemon=True)
+        self._worker.start()
+
+    def submit(self, ass1, test1, test2, model=None):
+        # model: score against a specific (e.g. per-programme) model instead of the default
+        future = Future()
+        self._queue.put(((ass1, test1, test2), model or self.model, future))
+        return future
+
+    def score(self, ass1, test1, test2, model=None, timeout=5.0):
+        # Blocking helper for the script thread: returns (cluster, distances)
+        return self.submit(ass1, test1, test2, model).result(timeout=timeout)
+
+    def _collect(self):
+        # Wait for the first request, then take whatever is already queued - no sleeping
+        batch = [self._queue.get()]
+        while len(batch) < self.max_batch:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+
+            # One vectorized call per model in the batch
+            groups = {}
+            for marks, model, future in batch:
+                groups.setdefault(id(model), (model, [], []))
+                groups[id(model)][1].append(marks)
+                groups[id(model)][2].append(future)
+
+            for model, rows, futures in groups.values():
+                X = np.array(rows, dtype=np.float64)
+                try:
+                    with self.timings.span('batch_predict'):
+                        clusters, distances = model.predict_distances(X)
+                except Exception as e:
+                    for future in futures:
+                        future.set_exception(e)
+                    continue
+
+                for i, future in enumerate(futures):
+                    future.set_result((int(clusters[i]), distances[i]))
+
+            with self._lock:
+                self._requests += len(batch)
+                self._batches += 1
+                self._last_batch = len(batch)
+                self._max_batch_seen = max(self._max_batch_seen, len(batch))
+
+    def stats(self):
+        with self._lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "requests": self._requests,
+                "batches": self._batches,
+                "mean_batch_size": round(self._requests / self._batches, 2) if self._batches else 0,
+                "max_batch_size": self._max_batch_seen,
+                "last_batch_size": self._last_batch,
+            }
@@ -0,0 +1,103 @@
+"""Per-programme (and optionally per-year) centroid models.
+
+Models live in MODELS_DIR as model artifacts (or older centroid exports)
+named after the programme, e.g. ``models/bachelor-of-engineering.cmf`` or
+``models/bachelor-of-engineering__2025.cmf`` for one academic year. A
+programme without its own file uses the default model. Models are loaded
+on first use and kept in an LRU bounded by count and memory; replacing a
+file on disk is picked up on the next request without a restart.
+"""
+import os
+import re
+import threading
+from collections import OrderedDict
+
+from artifact import ARTIFACT_PATH, load_model_file
+from centroids import CENTROIDS_PATH
+from scoring import FEATURES
+
+MODELS_DIR = 'models'
+
+
+def slugify(programme):
+    return re.sub(r'[^a-z0-9]+', '-', programme.lower()).strip('-')
+
+
+class ModelRegistry:
+
+    def __init__(self, models_dir=MODELS_DIR, default_path=None,
+                 max_models=8, max_bytes=64 * 1024 * 1024):
+        self.models_dir = models_dir
+        if default_path is None:
+            default_path = ARTIFACT_PATH if os.path.exists(ARTIFACT_PATH) else CENTROIDS_PATH
+        self.default_path = default_path
+        self.max_models = max_models
+        self.max_bytes = max_bytes
+        self._models = OrderedDict()  # path -> (mtime, model, nbytes), least recently used first
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._loads = 0
+        self._evictions = 0
+
+    def resolve(self, programme=None, year=None):
+        # Most specific file wins: programme + year, then programme, then the default model
+        if programme:
+            slug = slugify(programme)
+            stems = [f"{slug}__{year}", slug] if year else [slug]
+            candidates = [stem + ext for stem in stems for ext in ('.cmf', '.npz')]
+            for name in candidates:
+                path = os.path.join(self.models_dir, name)
+                if os.path.exists(path):
+                    return path
+        return self.default_path
+
+    def get(self, programme=None, year=None):
+        path = self.resolve(programme, year)
+        mtime = os.stat(path).st_mtime_ns
+
+        with self._lock:
+            entry = self._models.get(path)
+            if entry is not None and entry[0] == mtime:
+                self._models.move_to_end(path)
+                self._hits += 1
+                return entry[1]
+
+        # Load outside the lock so other programmes are not held up; a changed
+        # file simply replaces the old entry (hot swap)
+        model = self._load(path)
+        nbytes = sum(a.nbytes for a in model.table.values()) + model.cluster_centers_.nbytes
+
+        with self._lock:
+            self._models[path] = (mtime, model, nbytes)
+            self._models.move_to_end(path)
+            self._loads += 1
+            self._evict()
+        return model
+
+    def _load(self, path):
+        model = load_model_file(path)
+        if model.n_features_in_ != len(FEATURES):
+            raise ValueError(f"{path}: expected {len(FEATURES)} features, got {model.n_features_in_}")
+        return model
+
+    def _evict(self):
+        # Drop least recently used models until within both limits (always keep one)
+        while len(self._models) > 1 and (len(self._models) > self.max_models
+                                         or self._resident_bytes() > self.max_bytes):
+            self._models.popitem(last=False)
+            self._evictions += 1
+
+    def _resident_bytes(self):
+        return sum(entry[2] for entry in self._models.values())
+
+    def stats(self):
+        with self._lock:
+            return {
+                "resident_models": [os.path.basename(p) for p in self._models],
+                "resident_bytes": self._resident_bytes(),
+                "max_models": self.max_models,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "loads": self._loads,
+                "evictions": self._evictions,
+            }
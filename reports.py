@@ -0,0 +1,293 @@
+"""Printable eligibility letters and cohort reports from a scored roster.
+
+Streams a scored roster (the CSV written by batch_score.py) chunk by chunk:
+worker processes render one HTML letter per student from templates compiled
+once at import and write them straight to disk, while the parent folds each
+chunk into running totals for the cohort summary (CSV + HTML). Only a
+bounded number of chunks is in flight, so memory stays flat for any cohort.
+
+    python batch_score.py marks.csv scored.csv
+    python reports.py scored.csv reports/ --workers 4
+"""
+import argparse
+import glob
+import hashlib
+import html
+import itertools
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from string import Template
+
+import numpy as np
+import pandas as pd
+
+from artifact import ARTIFACT_PATH, load_model_file
+from scoring import MARK_COLUMNS, MAX_MARKS, COMPONENT_RULES, PASS_MARK, TOTAL_MARKS
+
+# Shown on eligible students' letters - keep in step with the results page
+EXAM_DETAILS = [
+    ("Date", "December 15, 2024"),
+    ("Time", "9:00 AM - 12:00 PM"),
+    ("Venue", "Main Examination Hall"),
+    ("Requirements", "Student ID, Calculator, Pens"),
+]
+IMPROVEMENT_PLAN = [
+    "Attend remedial classes (Starting next week)",
+    "Submit supplementary assignments",
+    "Schedule meeting with academic advisor",
+    "Re-assessment opportunity in January 2025",
+]
+
+_STYLE = """
+body { font-family: Georgia, serif; color: #2c3e50; max-width: 720px; margin: 40px auto; }
+h1 { color: #1e3c72; border-bottom: 3px solid #1e3c72; padding-bottom: 8px; }
+table { border-collapse: collapse; width: 100%; margin: 16px 0; }
+th, td { border: 1px solid #c3cfe2; padding: 6px 10px; text-align: left; }
+th { background: #e0eafc; }
+.eligible { color: #00a046; } .not-eligible { color: #d0342c; } .review { color: #b9770e; }
+@media print { body { margin: 0; } }
+"""
+
+# Compiled once per process; substitute() is all that runs per student
+LETTER = Template("""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Exam eligibility - $reg_no</title><style>$style</style></head>
+<body>
+<h1>🎓 University Exam Eligibility</h1>
+<p>$today</p>
+<p>Dear $student_name,<br>Registration number: <b>$reg_no</b></p>
+<h2 class="$status_class">$status</h2>
+$body
+<table>
+<tr><th>Component</th><th>Mark</th></tr>
+$mark_rows
+<tr><th>Total</th><th>$total / $total_marks ($percentage%)</th></tr>
+</table>
+<p>Grade: <b>$grade</b> &middot; AI classification: <b>$cluster_name</b> (confidence $confidence)</p>
+<p>Strengths: $strengths<br>To improve: $weaknesses</p>
+<p>Examinations Office</p>
+</body></html>
+""")
+ELIGIBLE_BODY = Template("""<p>Congratulations! You have qualified for the University Final Examination.</p>
+<ul>$details</ul>""")
+NOT_ELIGIBLE_BODY = Template("""<p>You have not yet met the requirements for the Final Examination
+(required minimum $pass_mark/$total_marks marks; you need $shortfall more).</p>
+<ul>$plan</ul>
+<p>$advice</p>""")
+REVIEW_BODY = Template("""<p>Your marks and the AI assessment disagree, so your eligibility will be
+reviewed by the Examinations Office. You will be contacted within two weeks.</p>
+<p>$advice</p>""")
+MARK_ROW = Template("<tr><td>$name</td><td>$mark / $max</td></tr>")
+
+SUMMARY_PAGE = Template("""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Cohort eligibility report</title><style>$style</style></head>
+<body>
+<h1>📊 Cohort Eligibility Report</h1>
+<p>$today &middot; $students students</p>
+<table>
+<tr><th>Group</th><th>Students</th><th>Mean total</th><th>Eligible (manual)</th><th>Eligible (AI)</th>
+<th>Eligible (both)</th><th>Borderline</th></tr>
+$rows
+</table>
+</body></html>
+""")
+SUMMARY_ROW = Template("<tr><td>$group</td><td>$students</td><td>$mean_total</td><td>$eligible_manual</td>"
+                       "<td>$eligible_ai</td><td>$eligible</td><td>$borderline</td></tr>")
+
+_DETAILS_HTML = "".join(f"<li><b>{k}:</b> {v}</li>" for k, v in EXAM_DETAILS)
+_PLAN_HTML = "".join(f"<li>{item}</li>" for item in IMPROVEMENT_PLAN)
+_SUMMARY_COUNTS = ['students', 'total', 'eligible_manual', 'eligible_ai', 'eligible', 'borderline']
+
+# Model loaded once per worker process (for the "marks needed" advice)
+_model = None
+
+
+def _init_worker(model_path):
+    global _model
+    _model = load_model_file(model_path) if model_path else None
+
+
+def letter_names(reg_nos):
+    # File name (without .html) of each student's letter: the reg_no made file-system safe,
+    # plus a short hash of the original when that changed it ("SC/2023-001" vs "SC_2023-001").
+    # Blank reg_nos get "_row-<row>" - sanitized names never start with "_", so it cannot
+    # clash with a real one.
+    reg = reg_nos.astype('string').str.strip()
+    blank = (reg.isna() | (reg == '')).to_numpy(dtype=bool)
+    safe = reg.str.replace(r'[^A-Za-z0-9_.-]+', '_', regex=True).str.strip('_.')
+    changed = (safe != reg).fillna(False).to_numpy(dtype=bool) & ~blank
+    names = np.array(safe.where(safe != '', 'student'), dtype=object)
+    names[changed] = [f"{name}-{hashlib.sha256(raw.encode('utf-8')).hexdigest()[:8]}"
+                      for name, raw in zip(names[changed], reg[changed])]
+    names[blank] = [f"_row-{i}" for i in reg_nos.index[blank]]
+    return pd.Series(names, index=reg_nos.index, dtype=object)
+
+
+def check_reg_nos(path):
+    # Fails before any letter is written if two rows would get the same letter file:
+    # a repeated reg_no (batch_score.py only checks within each chunk), or distinct
+    # reg_nos whose names differ only in case (the same file on some file systems)
+    reg_nos = pd.read_csv(path, usecols=lambda c: c == 'reg_no', dtype=str)
+    if 'reg_no' not in reg_nos.columns:
+        return
+    names = letter_names(reg_nos['reg_no'])
+    clash = names.str.lower().duplicated(keep=False)
+    if clash.any():
+        rows = reg_nos.loc[clash, 'reg_no'].groupby(names[clash].str.lower(), sort=False)
+        examples = "; ".join(f"{', '.join(map(repr, group.unique()))} (rows {', '.join(map(str, group.index[:5]))})"
+                             for _, group in itertools.islice(rows, 5))
+        raise ValueError(f"{path}: {int(clash.sum())} rows share a letter file with another row - "
+                         f"duplicate reg_no? {examples}. No letters were written.")
+
+
+def _advice(needed):
+    # needed: one row of LookupModel.marks_needed (per component, then combined)
+    options = [f"raise {COMPONENT_RULES[c][0]} by {n:.1f}" for c, n in zip(MARK_COLUMNS, needed) if n > 0]
+    if options:
+        return "Any one of these would make you eligible: " + "; ".join(options) + "."
+    if needed[-1] > 0:
+        return f"You need at least {needed[-1]:.1f} more marks spread across several components."
+    return "Please see your academic advisor to plan your next steps."
+
+
+def render_letter(row, needed, today):
+    marks = {c: row[c] for c in MARK_COLUMNS}
+    eligible_manual, eligible_ai = bool(row['eligible_manual']), bool(row['eligible_ai'])
+    advice = html.escape(_advice(needed)) if needed is not None else ""
+    name, reg_no = row.get('student_name'), row.get('reg_no')
+    if eligible_manual and eligible_ai:
+        body, status, status_class = ELIGIBLE_BODY.substitute(details=_DETAILS_HTML), "ELIGIBLE FOR FINAL EXAM", "eligible"
+    elif not eligible_manual and not eligible_ai:
+        body = NOT_ELIGIBLE_BODY.substitute(pass_mark=PASS_MARK, total_marks=TOTAL_MARKS, plan=_PLAN_HTML,
+                                            shortfall=f"{max(0, PASS_MARK - row['total']):.1f}", advice=advice)
+        status, status_class = "NOT ELIGIBLE FOR FINAL EXAM", "not-eligible"
+    else:
+        body, status, status_class = REVIEW_BODY.substitute(advice=advice), "ELIGIBILITY UNDER REVIEW", "review"
+
+    return LETTER.substitute(
+        style=_STYLE, today=today, reg_no=html.escape(reg_no if isinstance(reg_no, str) and reg_no else "-"),
+        student_name=html.escape(name if isinstance(name, str) and name else "Student"),
+        status=status, status_class=status_class, body=body,
+        mark_rows="".join(MARK_ROW.substitute(name=COMPONENT_RULES[c][0], mark=f"{marks[c]:g}", max=f"{MAX_MARKS[c]:g}")
+                          for c in MARK_COLUMNS),
+        total=f"{row['total']:g}", total_marks=TOTAL_MARKS, percentage=f"{row['percentage']:.1f}",
+        grade=html.escape(str(row['grade'])), cluster_name=html.escape(str(row['cluster_name'])),
+        confidence=f"{row['confidence']:.0%}" if 'confidence' in row else "n/a",
+        strengths=html.escape(str(row['strengths'])), weaknesses=html.escape(str(row['weaknesses'])),
+    )
+
+
+def _render_chunk(chunk, letters_dir, today):
+    # Worker: render and write every letter in the chunk; returns how many were written
+    needed = None
+    if _model is not None:
+        needed = _model.marks_needed(chunk[MARK_COLUMNS].to_numpy(dtype=np.float64))
+    names = letter_names(chunk['reg_no'])
+    for i, (row, name) in enumerate(zip(chunk.to_dict('records'), names)):
+        letter = render_letter(row, needed[i] if needed is not None else None, today)
+        with open(os.path.join(letters_dir, name + '.html'), 'w', encoding='utf-8') as f:
+            f.write(letter)
+    return len(chunk)
+
+
+def iter_scored(path, chunksize=5_000):
+    # Scored roster chunks, always with a reg_no column (blank when the roster has none).
+    # The index keeps counting across chunks, so it is the row number in the file.
+    for chunk in pd.read_csv(path, chunksize=chunksize, dtype={'reg_no': str, 'student_name': str}):
+        if 'reg_no' not in chunk.columns:
+            chunk['reg_no'] = pd.NA
+        yield chunk
+
+
+def accumulate(totals, chunk, group_by):
+    # Fold one chunk into running per-group sums (a few numbers per group, however many rows)
+    both = chunk['eligible_manual'] & chunk['eligible_ai']
+    frame = pd.DataFrame({
+        'group': chunk[group_by].fillna("(none)") if group_by in chunk.columns else "All students",
+        'students': 1,
+        'total': chunk['total'],
+        'eligible_manual': chunk['eligible_manual'].astype(int),
+        'eligible_ai': chunk['eligible_ai'].astype(int),
+        'eligible': both.astype(int),
+        'borderline': chunk['borderline'].astype(int) if 'borderline' in chunk.columns else 0,
+    })
+    for group, sums in frame.groupby('group')[_SUMMARY_COUNTS].sum().iterrows():
+        totals[group] = totals.get(group, 0) + sums.to_numpy()
+    return totals
+
+
+def write_summary(totals, out_dir, today):
+    groups = sorted(totals)
+    overall = sum(totals.values())
+    rows = [(g, totals[g]) for g in groups] + ([("All students", overall)] if len(groups) > 1 else [])
+    summary = pd.DataFrame([{
+        'group': g,
+        'students': int(s[0]),
+        'mean_total': round(s[1] / s[0], 2),
+        'eligible_manual_rate': round(s[2] / s[0], 4),
+        'eligible_ai_rate': round(s[3] / s[0], 4),
+        'eligible_rate': round(s[4] / s[0], 4),
+        'borderline': int(s[5]),
+    } for g, s in rows])
+    summary.to_csv(os.path.join(out_dir, 'cohort_summary.csv'), index=False)
+
+    html_rows = "\n".join(SUMMARY_ROW.substitute(
+        group=html.escape(str(r.group)), students=r.students, mean_total=f"{r.mean_total:.1f}",
+        eligible_manual=f"{r.eligible_manual_rate:.1%}", eligible_ai=f"{r.eligible_ai_rate:.1%}",
+        eligible=f"{r.eligible_rate:.1%}", borderline=r.borderline) for r in summary.itertuples())
+    with open(os.path.join(out_dir, 'cohort_report.html'), 'w', encoding='utf-8') as f:
+        f.write(SUMMARY_PAGE.substitute(style=_STYLE, today=today, students=int(overall[0]) if rows else 0,
+                                        rows=html_rows))
+    return summary
+
+
+def run(scored_path, out_dir, model_path=ARTIFACT_PATH, chunksize=5_000, workers=None,
+        group_by='programme'):
+    workers = workers or os.cpu_count() or 1
+    check_reg_nos(scored_path)
+    letters_dir = os.path.join(out_dir, 'letters')
+    os.makedirs(letters_dir, exist_ok=True)
+    # Letters from an earlier run do not belong to this roster
+    for old in glob.glob(os.path.join(letters_dir, '*.html')):
+        os.remove(old)
+    today = date.today().strftime('%B %d, %Y')
+    totals, letters = {}, 0
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(model_path,)) as pool:
+        # Bounded number of chunks in flight; totals are folded in as chunks are read
+        pending = deque()
+        for chunk in iter_scored(scored_path, chunksize):
+            accumulate(totals, chunk, group_by)
+            pending.append(pool.submit(_render_chunk, chunk, letters_dir, today))
+            if len(pending) >= workers * 2:
+                letters += pending.popleft().result()
+        while pending:
+            letters += pending.popleft().result()
+
+    write_summary(totals, out_dir, today)
+    return letters
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write eligibility letters and a cohort report for a scored roster.")
+    parser.add_argument('scored', help="scored roster CSV (output of batch_score.py)")
+    parser.add_argument('output', help="output directory (letters/, cohort_summary.csv, cohort_report.html)")
+    parser.add_argument('--model', default=ARTIFACT_PATH,
+                        help="model for the 'marks needed' advice; '' to leave it out (default: %(default)s)")
+    parser.add_argument('--chunksize', type=int, default=5_000, help="students per chunk")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument('--group-by', default='programme', help="summary column (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    letters = run(args.scored, args.output, args.model or None, args.chunksize, args.workers, args.group_by)
+    print(f"Wrote {letters} letters and the cohort report to {args.output} in "
+          f"{time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
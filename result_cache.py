@@ -0,0 +1,60 @@
+"""Bounded, process-wide cache for prediction results and serialized distance charts.
+
+Students re-check the same marks a lot and marks sit on a 0.5 grid, so
+results are memoized per (marks, model version) with LRU eviction by size
+and expiry by age.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class ResultCache:
+
+    def __init__(self, maxsize=2048, ttl=3600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()  # key -> (stored_at, value), oldest first
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None and time.monotonic() - item[0] > self.ttl:
+                del self._data[key]
+                self._evictions += 1
+                item = None
+            if item is None:
+                self._misses += 1
+                return None
+            self._data.move_to_end(key)
+            self._hits += 1
+            return item[1]
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self._evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._data),
+                "max_entries": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "hit_rate": round(self._hits / lookups, 3) if lookups else 0.0,
+            }
@@ -0,0 +1,100 @@
+"""Incremental retraining on streaming mark records.
+
+Reads CSV or Parquet files chunk by chunk and updates the cluster centres
+with mini-batch k-means (warm-started from the current model), so memory
+stays flat however long the history is. The new clusters are then put in
+the same order as the current model's, so the EXCELLENT / VERY GOOD /
+AVERAGE / BELOW AVERAGE labels keep their meaning, and a new model
+artifact is written atomically for the app to pick up.
+
+    python retrain.py marks_2023.csv marks_2024.parquet --passes 2
+    python retrain.py history/*.csv --output "models/bachelor-of-engineering.cmf"
+    python retrain.py marks_archive --programme "Bachelor of Engineering" --year 2023 --year 2024
+"""
+import argparse
+import itertools
+import sys
+import time
+
+import numpy as np
+
+from artifact import ARTIFACT_PATH, load_model_file, save_artifact
+from centroids import CentroidModel
+from scoring import FEATURES, MARK_COLUMNS, iter_chunks
+from validation import validate_marks
+
+
+def iter_feature_chunks(paths, chunksize=100_000, programme=None, year=None):
+    for path in paths:
+        for chunk in iter_chunks(path, chunksize, programme, year, columns=MARK_COLUMNS):
+            clean, _ = validate_marks(chunk, check_reg_no=False)
+            if len(clean):
+                yield clean[FEATURES].to_numpy(dtype=np.float64)
+
+
+def match_clusters(new_centers, reference_centers):
+    # Order the new centres so that new[i] is the one closest to reference[i]
+    # (exhaustive over permutations - k is 4, so 24 candidates)
+    k = len(reference_centers)
+    cost = np.linalg.norm(new_centers[:, None, :] - reference_centers[None, :, :], axis=2)
+    best = min(itertools.permutations(range(k)),
+               key=lambda perm: cost[list(perm), range(k)].sum())
+    return np.asarray(best)
+
+
+def retrain(paths, reference, chunksize=100_000, passes=1, batch_size=4096, random_state=42,
+            programme=None, year=None):
+    # Training-only dependency; serving never imports scikit-learn
+    from sklearn.cluster import MiniBatchKMeans
+
+    kmeans = MiniBatchKMeans(n_clusters=reference.n_clusters, init=reference.cluster_centers_,
+                             n_init=1, batch_size=batch_size, random_state=random_state)
+    rows = 0
+    for _ in range(passes):
+        for X in iter_feature_chunks(paths, chunksize, programme, year):
+            # partial_fit needs at least k samples in the very first call
+            if not rows and len(X) < reference.n_clusters:
+                continue
+            for start in range(0, len(X), batch_size):
+                kmeans.partial_fit(X[start:start + batch_size])
+            rows += len(X)
+    if not rows:
+        raise ValueError("No valid mark rows found to train on")
+
+    order = match_clusters(kmeans.cluster_centers_, reference.cluster_centers_)
+    return kmeans.cluster_centers_[order], rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Refit the cluster centres on streaming mark files.")
+    parser.add_argument('inputs', nargs='+',
+                        help="CSV or Parquet files with ass1, ass2, test1, test2, or marks archive directories")
+    parser.add_argument('--reference', default=ARTIFACT_PATH,
+                        help="current model: warm start and label order (default: %(default)s)")
+    parser.add_argument('--output', default=ARTIFACT_PATH, help="artifact to write (default: %(default)s)")
+    parser.add_argument('--chunksize', type=int, default=100_000, help="rows read per chunk")
+    parser.add_argument('--passes', type=int, default=1, help="passes over the input")
+    parser.add_argument('--batch-size', type=int, default=4096, help="mini-batch size")
+    parser.add_argument('--programme', action='append', default=None,
+                        help="archive inputs: only this programme (repeatable; default: all)")
+    parser.add_argument('--year', type=int, action='append', default=None,
+                        help="archive inputs: only this academic year (repeatable; default: all)")
+    args = parser.parse_args(argv)
+
+    reference = load_model_file(args.reference)
+    start = time.perf_counter()
+    centers, rows = retrain(args.inputs, reference, args.chunksize, args.passes, args.batch_size,
+                            programme=args.programme, year=args.year)
+    save_artifact(CentroidModel(centers), args.output,
+                  cluster_names=reference.cluster_names,
+                  cluster_colors=reference.cluster_colors,
+                  cluster_eligibility=reference.cluster_eligibility)
+
+    shift = np.linalg.norm(centers - reference.cluster_centers_, axis=1)
+    print(f"Trained on {rows} rows in {time.perf_counter() - start:.1f}s; "
+          f"centre shift per cluster: {np.round(shift, 3).tolist()}", file=sys.stderr)
+    print(f"Wrote {args.output}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
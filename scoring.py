@@ -0,0 +1,208 @@
+"""Shared scoring logic for the exam eligibility system.
+
+Kept free of Streamlit/Plotly imports so it can be used by the app and by
+offline jobs that score whole rosters at once. pandas is imported only by
+the roster helpers that need it.
+"""
+import os
+
+import numpy as np
+
+# Model uses 3 features only: ass1, test1, test2 (ass2 counts towards the total)
+FEATURES = ['ass1', 'test1', 'test2']
+MARK_COLUMNS = ['ass1', 'ass2', 'test1', 'test2']
+MAX_MARKS = {'ass1': 5.0, 'ass2': 5.0, 'test1': 15.0, 'test2': 15.0}
+MARK_STEP = 0.5  # marks are entered in half-mark steps
+TOTAL_MARKS = 40
+PASS_MARK = 28
+
+# Define cluster meanings based on analysis
+CLUSTER_NAMES = {
+    1: "🌟 EXCELLENT",
+    3: "✨ VERY GOOD",
+    0: "📊 AVERAGE",
+    2: "⚠️ BELOW AVERAGE"
+}
+
+CLUSTER_COLORS = {
+    1: "#00d25b",  # Green
+    3: "#17a2b8",  # Teal
+    0: "#ffc107",  # Yellow
+    2: "#dc3545"   # Red
+}
+
+CLUSTER_ELIGIBILITY = {
+    1: True,   # Excellent -> Eligible
+    3: True,   # Very Good -> Eligible
+    0: False,  # Average -> Not Eligible
+    2: False   # Below Average -> Not Eligible
+}
+
+# Soft assignment: softmax temperature over centroid distances (in marks), and
+# the runner-up gap below which a student counts as borderline between clusters
+SOFTMAX_SCALE = 1.0
+BORDERLINE_MARGIN = 1.0
+
+# Grade bands: (minimum total, label), highest first
+GRADE_BANDS = [
+    (32, "🌟 Excellent"),
+    (28, "✨ Very Good"),
+    (20, "📊 Average"),
+    (0, "⚠️ Below Average"),
+]
+
+# Per-component rules: (display name, strength if mark >= this, weakness if mark < this)
+COMPONENT_RULES = {
+    'ass1': ("Assignment 1", 4.0, 2.5),
+    'ass2': ("Assignment 2", 4.0, 2.5),
+    'test1': ("Test 1", 12.0, 7.5),
+    'test2': ("Test 2", 12.0, 7.5),
+}
+
+# Every strength/weakness combination as text, indexed by a bitmask over MARK_COLUMNS
+_COMPONENT_COMBOS = np.array(
+    [", ".join(COMPONENT_RULES[c][0] for bit, c in enumerate(MARK_COLUMNS) if code >> bit & 1) or "None"
+     for code in range(1 << len(MARK_COLUMNS))], dtype=object)
+
+
+def read_roster(file):
+    # Accepts a path or an uploaded file object; Excel by extension, CSV otherwise
+    import pandas as pd
+    name = str(getattr(file, 'name', file)).lower()
+    if name.endswith(('.xlsx', '.xls')):
+        df = pd.read_excel(file)
+    else:
+        df = pd.read_csv(file)
+    return normalize_columns(df)
+
+
+def normalize_columns(df):
+    # Trimmed, lower-case column names - what validation and scoring look up
+    df.columns = [str(c).strip().lower() for c in df.columns]
+    return df
+
+
+def iter_chunks(path, chunksize=100_000, programme=None, year=None, columns=None):
+    # DataFrames of at most chunksize rows, with normalized column names, from a CSV or
+    # Parquet file or from a marks archive directory (only `columns` of the selected
+    # programme/year partitions, plus the programme and year keys that pick each row's model)
+    import pandas as pd
+    if os.path.isdir(path):
+        from archive import MarksArchive
+        if columns is not None:
+            columns = list(columns) + [c for c in ('programme', 'year') if c not in columns]
+        chunks = MarksArchive(path).iter_frames(columns, programme, year, batch_size=chunksize)
+    elif path.lower().endswith(('.parquet', '.pq')):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Reading Parquet needs pyarrow: pip install pyarrow") from None
+        chunks = (batch.to_pandas() for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize))
+    else:
+        chunks = pd.read_csv(path, chunksize=chunksize)
+    for chunk in chunks:
+        yield normalize_columns(chunk)
+
+
+def grade_labels(totals):
+    # Band lookup by binary search over the ascending band minimums
+    totals = np.asarray(totals, dtype=float)
+    minimums = np.array([minimum for minimum, _ in GRADE_BANDS[::-1]], dtype=float)
+    labels = np.array([label for _, label in GRADE_BANDS[::-1]], dtype=object)
+    band = np.searchsorted(minimums, totals, side='right') - 1
+    return labels[np.clip(band, 0, None)]
+
+
+def component_names(mask):
+    # (n, 4) boolean matrix over MARK_COLUMNS -> "Assignment 1, Test 2" / "None" per row
+    codes = np.asarray(mask, dtype=np.intp) @ (1 << np.arange(len(MARK_COLUMNS)))
+    return _COMPONENT_COMBOS[codes]
+
+
+def soft_assignment(distances, clusters=None):
+    # (n, k) centroid distances -> confidence (softmax probability of the assigned
+    # cluster) and margin (runner-up distance minus nearest), from the same distances
+    distances = np.asarray(distances, dtype=float).reshape(-1, np.shape(distances)[-1])
+    if clusters is None:
+        clusters = distances.argmin(axis=1)
+    nearest = distances.min(axis=1)
+    # Shift by the nearest distance so exp() cannot overflow/underflow to 0/0
+    weights = np.exp(-(distances - nearest[:, None]) / SOFTMAX_SCALE)
+    rows = np.arange(len(distances))
+    confidence = weights[rows, np.asarray(clusters, dtype=np.intp)] / weights.sum(axis=1)
+    two = np.partition(distances, 1, axis=1)
+    return {
+        'confidence': confidence,
+        'margin': two[:, 1] - two[:, 0],
+    }
+
+
+def evaluate_rules(marks):
+    # marks: (n, 4) array-like in MARK_COLUMNS order; every rule is a column-wise array op
+    marks = np.asarray(marks, dtype=float).reshape(-1, len(MARK_COLUMNS))
+    strong = np.array([COMPONENT_RULES[c][1] for c in MARK_COLUMNS])
+    weak = np.array([COMPONENT_RULES[c][2] for c in MARK_COLUMNS])
+    # Same left-to-right order as ass1 + ass2 + test1 + test2
+    totals = marks[:, 0] + marks[:, 1] + marks[:, 2] + marks[:, 3]
+    return {
+        'total': totals,
+        'percentage': totals / TOTAL_MARKS * 100,
+        'grade': grade_labels(totals),
+        'eligible_manual': totals >= PASS_MARK,
+        'strengths': component_names(marks >= strong),
+        'weaknesses': component_names(marks < weak),
+    }
+
+
+def score_roster(model, df):
+    # Vectorized version of the single-student flow: one predict for the whole roster
+    out = df.copy()
+    rules = evaluate_rules(out[MARK_COLUMNS].to_numpy(dtype=float))
+    X = out[FEATURES].to_numpy(dtype=float)
+    clusters, distances = model.predict_distances(X)
+    soft = soft_assignment(distances, clusters)
+
+    # Models loaded from an artifact carry their own label mappings
+    cluster_names = getattr(model, 'cluster_names', None) or CLUSTER_NAMES
+    cluster_eligibility = getattr(model, 'cluster_eligibility', None) or CLUSTER_ELIGIBILITY
+    n_clusters = max(cluster_names) + 1
+    names = np.array([cluster_names.get(i, f"Cluster {i}") for i in range(n_clusters)], dtype=object)
+    eligible = np.array([cluster_eligibility.get(i, False) for i in range(n_clusters)])
+
+    out['total'] = rules['total']
+    out['percentage'] = rules['percentage'].round(1)
+    out['grade'] = rules['grade']
+    out['eligible_manual'] = rules['eligible_manual']
+    out['strengths'] = rules['strengths']
+    out['weaknesses'] = rules['weaknesses']
+    out['cluster'] = clusters
+    out['cluster_name'] = names[clusters]
+    out['eligible_ai'] = eligible[clusters]
+    out['confidence'] = soft['confidence'].round(3)
+    out['margin'] = soft['margin'].round(3)
+    out['borderline'] = soft['margin'] < BORDERLINE_MARGIN
+    out['status'] = np.where(out['eligible_manual'] & out['eligible_ai'], "✅ ELIGIBLE",
+                             np.where(~out['eligible_manual'] & ~out['eligible_ai'],
+                                      "❌ NOT ELIGIBLE", "⚠️ REVIEW"))
+    out['model_version'] = getattr(model, 'version', None)
+    return out
+
+
+def score_by_programme(model_for, df, year=None):
+    # score_roster with each programme-year's own model: model_for(programme, year) is
+    # e.g. ModelRegistry.get. programme/year columns win; `year` is used for rows without one.
+    import pandas as pd
+    if 'programme' in df.columns:
+        programmes = df['programme'].astype('string').str.strip().fillna('')
+    else:
+        programmes = pd.Series('', index=df.index, dtype='string')
+    if 'year' in df.columns:
+        years = pd.to_numeric(df['year'], errors='coerce').astype('Int64').astype(object)
+        years = years.where(years.notna(), year)
+    else:
+        years = pd.Series([year] * len(df), index=df.index, dtype=object)
+    if not len(df):
+        return score_roster(model_for(None, year), df)
+    parts = [score_roster(model_for(name or None, group_year if pd.notna(group_year) else None), group)
+             for (name, group_year), group in df.groupby([programmes, years], sort=False, dropna=False)]
+    return pd.concat(parts).loc[df.index]
@@ -0,0 +1,330 @@
+"""Asynchronous HTTP scoring service - no Streamlit.
+
+Serves the same cluster prediction, distances, confidence and rule-based
+eligibility as the app, from the same model artifacts (per programme/year
+through the model registry). Plain asyncio streams with HTTP/1.1
+keep-alive; every response carries its server-side latency in a
+Server-Timing header, and per-endpoint p50/p95/p99 are available.
+
+    python scoring_api.py --host 127.0.0.1 --port 8600
+
+    POST /score        {"ass1": 4, "ass2": 3.5, "test1": 12, "test2": 11.5,
+                        "programme": "Bachelor of Engineering"}       (programme/year optional)
+    POST /score/batch  {"rows": [{"reg_no": "...", "ass1": ...}, ...], "programme": ...}
+    GET  /health       model version
+    GET  /stats        latency percentiles, model registry and request counts (JSON)
+    GET  /metrics      the same in Prometheus text format
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+import traceback
+
+import numpy as np
+import pandas as pd
+
+from model_registry import ModelRegistry
+from scoring import (FEATURES, MARK_COLUMNS, MAX_MARKS, MARK_STEP, BORDERLINE_MARGIN, evaluate_rules,
+                     soft_assignment)
+from timing import Timings
+from validation import validate_marks
+
+MAX_HEADER_BYTES = 64 * 1024
+MAX_BODY_BYTES = 32 * 1024 * 1024
+KEEP_ALIVE_TIMEOUT = 15.0
+
+ENDPOINTS = ('/score', '/score/batch', '/health', '/stats', '/metrics')
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            408: "Request Timeout", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class RequestError(Exception):
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _status(manual, ai):
+    return np.where(manual & ai, "ELIGIBLE", np.where(~manual & ~ai, "NOT ELIGIBLE", "REVIEW"))
+
+
+def score_marks(model, marks):
+    # marks: (n, 4) float array in MARK_COLUMNS order, already validated.
+    # Returns column arrays - one distance pass feeds cluster, confidence and margin.
+    features = marks[:, [MARK_COLUMNS.index(f) for f in FEATURES]]
+    clusters, distances = model.predict_distances(features)
+    soft = soft_assignment(distances, clusters)
+    rules = evaluate_rules(marks)
+    eligible_ai = model.eligible_ai(features)
+    return {
+        'total': rules['total'],
+        'grade': rules['grade'],
+        'eligible_manual': rules['eligible_manual'],
+        'cluster': clusters,
+        'cluster_name': np.array([model.cluster_names.get(int(c), f"Cluster {c}") for c in range(model.n_clusters)],
+                                 dtype=object)[clusters],
+        'eligible_ai': eligible_ai,
+        'status': _status(rules['eligible_manual'], eligible_ai),
+        'distances': distances,
+        'confidence': soft['confidence'],
+        'margin': soft['margin'],
+        'borderline': soft['margin'] < BORDERLINE_MARGIN,
+    }
+
+
+def _rows(columns, n):
+    # Column arrays -> list of JSON-ready dicts
+    out = [{} for _ in range(n)]
+    for name, values in columns.items():
+        values = values.tolist()
+        for row, value in zip(out, values):
+            row[name] = value
+    return out
+
+
+def _check_marks(payload):
+    # Fast path for one student: same rules as validation.validate_marks, no pandas
+    values = []
+    for col in MARK_COLUMNS:
+        value = payload.get(col)
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise RequestError(400, f"{col} must be a number")
+        if not 0 <= value <= MAX_MARKS[col]:
+            raise RequestError(400, f"{col} must be between 0 and {MAX_MARKS[col]:g}")
+        if value / MARK_STEP != round(value / MARK_STEP):
+            raise RequestError(400, f"{col} must be in steps of {MARK_STEP:g}")
+        values.append(float(value))
+    return values
+
+
+def _type_issues(rows):
+    # Per-cell JSON type checks for batch rows, matching _check_marks: marks must be numbers
+    # (not booleans) or null, reg_no a string or number. Returns [(row, reg_no, column, issue)].
+    issues = []
+    for i, row in enumerate(rows):
+        reg_no = row.get('reg_no')
+        if reg_no is not None and (isinstance(reg_no, bool) or not isinstance(reg_no, (str, int, float))):
+            issues.append((i, None, 'reg_no', 'invalid_type'))
+            reg_no = None
+        for col in MARK_COLUMNS:
+            value = row.get(col)
+            if value is not None and (isinstance(value, bool) or not isinstance(value, (int, float))):
+                issues.append((i, reg_no, col, 'non_numeric'))
+    return issues
+
+
+def _check_model_keys(payload):
+    # programme/year pick a model file, so only plain values are accepted
+    programme, year = payload.get('programme'), payload.get('year')
+    if programme is not None and not isinstance(programme, str):
+        raise RequestError(400, "programme must be a string")
+    if isinstance(year, str) and year.isdigit():
+        year = int(year)
+    if year is not None and (isinstance(year, bool) or not isinstance(year, int)):
+        raise RequestError(400, "year must be an integer")
+    return programme, year
+
+
+class ScoringService:
+
+    def __init__(self, registry=None):
+        self.registry = registry or ModelRegistry()
+        self.timings = Timings(enabled=True)
+        self.requests = 0
+        self.errors = 0
+        self.connections = 0
+        self.registry.get()  # fail fast if the default model is missing
+
+    # --- endpoints -------------------------------------------------------
+
+    def score_one(self, payload):
+        # Scalar path: one table lookup gives cluster and distances
+        values = _check_marks(payload)
+        model = self.registry.get(*_check_model_keys(payload))
+        marks = dict(zip(MARK_COLUMNS, values))
+        cluster, distances = model.score_one(*(marks[f] for f in FEATURES))
+        soft = soft_assignment(distances, [cluster])
+        rules = evaluate_rules([values])
+        eligible_manual = bool(rules['eligible_manual'][0])
+        eligible_ai = bool(model.cluster_eligibility.get(cluster, False))
+        return {
+            'total': float(rules['total'][0]),
+            'grade': rules['grade'][0],
+            'eligible_manual': eligible_manual,
+            'cluster': cluster,
+            'cluster_name': model.cluster_names.get(cluster, f"Cluster {cluster}"),
+            'eligible_ai': eligible_ai,
+            'status': str(_status(np.array(eligible_manual), np.array(eligible_ai))),
+            'distances': distances.tolist(),
+            'confidence': float(soft['confidence'][0]),
+            'margin': float(soft['margin'][0]),
+            'borderline': bool(soft['margin'][0] < BORDERLINE_MARGIN),
+            'model_version': model.version,
+        }
+
+    def score_batch(self, payload):
+        rows = payload.get('rows')
+        if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+            raise RequestError(400, "'rows' must be a list of objects")
+        model = self.registry.get(*_check_model_keys(payload))
+        if not rows:
+            return {'model_version': model.version, 'scored': 0, 'results': [], 'rejected': 0, 'issues': []}
+        try:
+            df = pd.DataFrame.from_records(rows)
+        except (TypeError, ValueError) as e:
+            raise RequestError(400, f"invalid rows: {e}") from None
+        # Wrongly typed cells reject their row here; validate_marks checks the rest
+        typed = pd.DataFrame(_type_issues(rows), columns=['row', 'reg_no', 'column', 'issue'])
+        try:
+            clean, report = validate_marks(df.drop(index=typed['row'].unique()))
+        except ValueError as e:
+            raise RequestError(400, str(e)) from None
+        if len(typed):
+            report = pd.concat([typed, report], ignore_index=True).sort_values('row', kind='stable')
+
+        results = _rows(score_marks(model, clean[MARK_COLUMNS].to_numpy(dtype=np.float64)), len(clean))
+        reg_nos = clean['reg_no'].tolist() if 'reg_no' in clean.columns else [None] * len(clean)
+        for index, reg_no, result in zip(clean.index.tolist(), reg_nos, results):
+            result['row'] = index
+            if reg_no is not None:
+                result['reg_no'] = reg_no
+        rejected = report.astype(object).where(report.notna(), None).to_dict('records')
+        return {'model_version': model.version, 'scored': len(results), 'results': results,
+                'rejected': int(report['row'].nunique()), 'issues': rejected}
+
+    def stats(self):
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "connections": self.connections,
+            "latency": self.timings.stats(),
+            "model_registry": self.registry.stats(),
+        }
+
+    def route(self, method, path, body):
+        # Returns (status, content type, body bytes)
+        path = path.split('?', 1)[0].rstrip('/') or '/'
+        if path == '/health':
+            return 200, 'application/json', _json({"status": "ok", "model_version": self.registry.get().version})
+        if path == '/stats':
+            return 200, 'application/json', _json(self.stats())
+        if path == '/metrics':
+            gauges = {"api_requests": self.requests, "api_errors": self.errors}
+            return 200, 'text/plain; version=0.0.4', self.timings.prometheus(prefix='exam_api', gauges=gauges).encode()
+        handlers = {'/score': self.score_one, '/score/batch': self.score_batch}
+        if path not in handlers:
+            raise RequestError(404, f"no such endpoint {path}")
+        if method != 'POST':
+            raise RequestError(405, f"{path} only accepts POST")
+        try:
+            payload = json.loads(body or b'{}')
+        except ValueError:
+            raise RequestError(400, "body is not valid JSON") from None
+        if not isinstance(payload, dict):
+            raise RequestError(400, "body must be a JSON object")
+        return 200, 'application/json', _json(handlers[path](payload))
+
+    # --- HTTP/1.1 ---------------------------------------------------------
+
+    async def handle(self, reader, writer):
+        self.connections += 1
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), KEEP_ALIVE_TIMEOUT)
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+                    return
+                except asyncio.LimitOverrunError:
+                    await self._send(writer, 413, 'application/json', _json({"error": "headers too large"}), False)
+                    return
+                start = time.perf_counter()
+                keep_alive = await self._serve_one(head, reader, writer, start)
+                if not keep_alive:
+                    return
+        finally:
+            writer.close()
+
+    async def _serve_one(self, head, reader, writer, start):
+        lines = head.decode('latin-1').split('\r\n')
+        try:
+            method, target, version = lines[0].split(' ', 2)
+        except ValueError:
+            await self._send(writer, 400, 'application/json', _json({"error": "bad request line"}), False)
+            return False
+        headers = {}
+        for line in lines[1:]:
+            if ':' in line:
+                name, value = line.split(':', 1)
+                headers[name.strip().lower()] = value.strip()
+        connection = headers.get('connection', '').lower()
+        keep_alive = connection != 'close' if version == 'HTTP/1.1' else connection == 'keep-alive'
+
+        try:
+            length = int(headers.get('content-length', 0) or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            await self._send(writer, 400, 'application/json', _json({"error": "invalid Content-Length"}), False)
+            return False
+        if length > MAX_BODY_BYTES:
+            await self._send(writer, 413, 'application/json', _json({"error": "body too large"}), False)
+            return False
+        body = await reader.readexactly(length) if length else b''
+
+        self.requests += 1
+        endpoint = target.split('?', 1)[0].rstrip('/') or '/'
+        with self.timings.span(f"{method} {endpoint}" if endpoint in ENDPOINTS else "other"):
+            try:
+                status, content_type, payload = self.route(method, target, body)
+            except RequestError as e:
+                self.errors += 1
+                status, content_type, payload = e.status, 'application/json', _json({"error": str(e)})
+            except Exception:
+                # Details go to the server log, not to the client
+                self.errors += 1
+                traceback.print_exc()
+                status, content_type, payload = 500, 'application/json', _json({"error": "internal server error"})
+        await self._send(writer, status, content_type, payload, keep_alive, time.perf_counter() - start)
+        return keep_alive
+
+    async def _send(self, writer, status, content_type, body, keep_alive, elapsed=None):
+        head = [f"HTTP/1.1 {status} {_REASONS.get(status, '')}",
+                f"Content-Type: {content_type}",
+                f"Content-Length: {len(body)}",
+                f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+        if elapsed is not None:
+            head.append(f"Server-Timing: app;dur={elapsed * 1000:.3f}")
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode('latin-1') + body)
+        await writer.drain()
+
+
+def _json(obj):
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+async def serve(host='127.0.0.1', port=8600, service=None):
+    service = service or ScoringService()
+    server = await asyncio.start_server(service.handle, host, port, limit=MAX_HEADER_BYTES)
+    print(f"Scoring API on http://{host}:{port} (model {service.registry.get().version})", file=sys.stderr)
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="HTTP scoring API for the exam eligibility models.")
+    parser.add_argument('--host', default='127.0.0.1', help="bind address (default: %(default)s)")
+    parser.add_argument('--port', type=int, default=8600, help="port (default: %(default)s)")
+    parser.add_argument('--models-dir', default='models', help="per-programme models (default: %(default)s)")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, ScoringService(ModelRegistry(models_dir=args.models_dir))))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
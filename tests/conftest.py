@@ -0,0 +1,34 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from artifact import ARTIFACT_PATH, load_artifact, save_artifact  # noqa: E402
+
+DEFAULT_MODEL = os.path.join(ROOT, ARTIFACT_PATH)
+
+
+def write_model(path, eligible):
+    # The shipped centres, with every cluster marked eligible (or none) - easy to tell apart
+    base = load_artifact(DEFAULT_MODEL)
+    save_artifact(base, str(path), cluster_names=base.cluster_names, cluster_colors=base.cluster_colors,
+                  cluster_eligibility={c: eligible for c in base.cluster_names})
+    return load_artifact(str(path))
+
+
+@pytest.fixture
+def models_dir(tmp_path):
+    path = tmp_path / 'models'
+    path.mkdir()
+    return path
+
+
+@pytest.fixture
+def low_marks():
+    # Marks the default model puts in a not-eligible cluster
+    return pd.DataFrame({'reg_no': ['R1', 'R2', 'R3'], 'ass1': [1.0, 0.5, 1.5], 'ass2': [1.0, 1.0, 0.5],
+                         'test1': [3.0, 2.5, 4.0], 'test2': [2.0, 3.5, 3.0]})
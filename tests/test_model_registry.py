@@ -0,0 +1,55 @@
+import os
+
+import pandas as pd
+
+from conftest import DEFAULT_MODEL, write_model
+from artifact import load_artifact
+from model_registry import ModelRegistry
+from scoring import score_by_programme
+
+ENGINEERING = 'Bachelor of Engineering'
+
+
+def test_resolve_prefers_programme_year_then_programme_then_default(models_dir):
+    write_model(models_dir / 'bachelor-of-engineering.cmf', True)
+    write_model(models_dir / 'bachelor-of-engineering__2024.cmf', True)
+    registry = ModelRegistry(str(models_dir), default_path=DEFAULT_MODEL)
+
+    assert registry.resolve(ENGINEERING, 2024).endswith('bachelor-of-engineering__2024.cmf')
+    assert registry.resolve(ENGINEERING, 2023).endswith('bachelor-of-engineering.cmf')
+    assert registry.resolve(ENGINEERING).endswith('bachelor-of-engineering.cmf')
+    assert registry.resolve('Bachelor of Science', 2024) == DEFAULT_MODEL
+    assert registry.resolve(None, 2024) == DEFAULT_MODEL
+
+
+def test_replaced_model_file_is_picked_up(models_dir):
+    path = models_dir / 'bachelor-of-engineering.cmf'
+    write_model(path, True)
+    registry = ModelRegistry(str(models_dir), default_path=DEFAULT_MODEL)
+    first = registry.get(ENGINEERING).version
+
+    write_model(path, False)
+    os.utime(path, ns=(os.stat(path).st_atime_ns, os.stat(path).st_mtime_ns + 1_000_000_000))
+    assert registry.get(ENGINEERING).version != first
+
+
+def test_score_by_programme_uses_each_programme_model(models_dir, low_marks):
+    engineering = write_model(models_dir / 'bachelor-of-engineering.cmf', True)
+    registry = ModelRegistry(str(models_dir), default_path=DEFAULT_MODEL)
+    roster = low_marks.assign(programme=[ENGINEERING, 'Bachelor of Science', f" {ENGINEERING} "])
+
+    scored = score_by_programme(registry.get, roster)
+
+    assert scored['reg_no'].tolist() == ['R1', 'R2', 'R3']
+    assert scored['eligible_ai'].tolist() == [True, False, True]
+    default = load_artifact(DEFAULT_MODEL)
+    assert scored['model_version'].tolist() == [engineering.version, default.version, engineering.version]
+
+
+def test_year_column_wins_over_default_year(models_dir, low_marks):
+    write_model(models_dir / 'bachelor-of-engineering__2024.cmf', True)
+    registry = ModelRegistry(str(models_dir), default_path=DEFAULT_MODEL)
+    roster = low_marks.assign(programme=ENGINEERING, year=pd.array([2024, None, 2023], dtype='Int64'))
+
+    assert score_by_programme(registry.get, roster, year=2024)['eligible_ai'].tolist() == [True, True, False]
+    assert score_by_programme(registry.get, roster, year=2025)['eligible_ai'].tolist() == [True, False, False]
@@ -0,0 +1,50 @@
+import os
+
+import pandas as pd
+import pytest
+
+from conftest import DEFAULT_MODEL
+from artifact import load_artifact
+from reports import letter_names, run
+from scoring import score_roster
+
+
+def scored_csv(tmp_path, reg_nos):
+    marks = pd.DataFrame({'reg_no': reg_nos, 'ass1': 4.0, 'ass2': 3.5, 'test1': 12.0, 'test2': 11.5})
+    path = tmp_path / 'scored.csv'
+    score_roster(load_artifact(DEFAULT_MODEL), marks).to_csv(path, index=False)
+    return str(path)
+
+
+def test_letter_names_keep_distinct_reg_nos_apart():
+    names = letter_names(pd.Series(['SC/2023-001', 'SC_2023-001', None, ' ', '_row-2']))
+    assert names[1] == 'SC_2023-001'
+    assert names[0].startswith('SC_2023-001-')
+    assert names[2:4].tolist() == ['_row-2', '_row-3']
+    assert names[4] != '_row-2'
+    assert names.nunique() == 5
+
+
+def test_duplicate_reg_no_fails_before_any_letter_is_written(tmp_path):
+    # The repeat is in a later chunk, where batch_score.py's per-chunk check cannot see it
+    path = scored_csv(tmp_path, [f"R{i}" for i in range(20)] + ['R3'])
+    out = tmp_path / 'reports'
+    with pytest.raises(ValueError, match="'R3'"):
+        run(path, str(out), model_path=None, chunksize=5, workers=1)
+    assert not out.exists()
+
+
+def test_case_only_differences_clash(tmp_path):
+    with pytest.raises(ValueError, match="'ab', 'AB'"):
+        run(scored_csv(tmp_path, ['ab', 'AB']), str(tmp_path / 'reports'), model_path=None, workers=1)
+
+
+def test_blank_reg_nos_get_row_letters(tmp_path):
+    out = tmp_path / 'reports'
+    letters = run(scored_csv(tmp_path, ['SC/2023-001', 'SC_2023-001', None]), str(out),
+                  model_path=None, chunksize=2, workers=1)
+
+    assert letters == 3
+    files = sorted(os.listdir(out / 'letters'))
+    assert len(files) == 3 and '_row-2.html' in files and 'SC_2023-001.html' in files
+    assert (out / 'cohort_summary.csv').exists()
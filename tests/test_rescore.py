@@ -0,0 +1,56 @@
+import pytest
+
+from conftest import DEFAULT_MODEL, write_model
+from decision_store import DecisionStore
+from model_registry import ModelRegistry
+from rescore import import_marks, rescore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return DecisionStore(str(tmp_path / 'decisions.db'))
+
+
+@pytest.fixture
+def registry(models_dir):
+    return ModelRegistry(str(models_dir), default_path=DEFAULT_MODEL)
+
+
+def scored_rows(done):
+    return sum(saved for _, saved in done.values())
+
+
+def test_only_new_or_changed_rows_are_rescored(store, registry, low_marks):
+    changed, report = import_marks(store, low_marks, programme='Bachelor of Science', year=2024)
+    assert (changed, len(report)) == (3, 0)
+    assert scored_rows(rescore(store, registry)) == 3
+    assert rescore(store, registry) == {}
+
+    # Re-importing the same marks changes nothing; one corrected mark re-scores one row
+    assert import_marks(store, low_marks, programme='Bachelor of Science', year=2024)[0] == 0
+    corrected = low_marks.assign(test1=[3.0, 2.5, 14.0])
+    assert import_marks(store, corrected, programme='Bachelor of Science', year=2024)[0] == 1
+    assert scored_rows(rescore(store, registry)) == 1
+    assert len(store.history('R3')) == 2
+
+
+def test_new_programme_model_rescores_only_its_group(store, registry, models_dir, low_marks):
+    import_marks(store, low_marks.iloc[:2], programme='Bachelor of Engineering', year=2024)
+    import_marks(store, low_marks.iloc[2:], programme='Bachelor of Science', year=2024)
+    rescore(store, registry)
+
+    model = write_model(models_dir / 'bachelor-of-engineering.cmf', True)
+    done = rescore(store, registry)
+    assert done == {('Bachelor of Engineering', 2024): (model.version, 2)}
+    assert store.latest('R1')['eligible_ai'] == 1
+    assert store.latest('R1')['model_version'] == model.version
+
+
+def test_year_column_wins_and_bad_years_are_rejected(store, low_marks):
+    roster = low_marks.assign(year=['2024/25', None, '2023'])
+    changed, report = import_marks(store, roster, programme='Bachelor of Science', year=2025)
+
+    assert changed == 2
+    assert report[['reg_no', 'column', 'issue']].values.tolist() == [['R1', 'year', 'invalid']]
+    assert store.roster_stats()['students'] == 2
+    assert sorted(store.roster_groups()) == [('Bachelor of Science', 2023), ('Bachelor of Science', 2025)]
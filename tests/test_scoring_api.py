@@ -0,0 +1,58 @@
+import pytest
+
+from conftest import DEFAULT_MODEL, write_model
+from model_registry import ModelRegistry
+from scoring_api import RequestError, ScoringService
+
+MARKS = {'ass1': 4.0, 'ass2': 3.5, 'test1': 12.0, 'test2': 11.5}
+
+
+@pytest.fixture
+def service(models_dir):
+    return ScoringService(ModelRegistry(str(models_dir), default_path=DEFAULT_MODEL))
+
+
+@pytest.mark.parametrize('value', [True, '4', [4], None, 5.5, 3.25])
+def test_score_rejects_bad_marks(service, value):
+    with pytest.raises(RequestError) as error:
+        service.score_one(dict(MARKS, ass1=value))
+    assert error.value.status == 400
+
+
+@pytest.mark.parametrize('keys', [{'programme': 7}, {'year': '2024/25'}, {'year': True}])
+def test_bad_model_keys_are_a_bad_request(service, keys):
+    with pytest.raises(RequestError) as error:
+        service.score_batch(dict(keys, rows=[dict(MARKS, reg_no='A')]))
+    assert error.value.status == 400
+
+
+def test_batch_rejects_the_cells_score_rejects(service):
+    rows = [dict(MARKS, reg_no='bool', ass1=True),
+            dict(MARKS, reg_no=['list']),
+            dict(MARKS, reg_no='text', test1='12'),
+            dict(MARKS, reg_no='ok'),
+            dict(MARKS, reg_no='range', test2=16.0)]
+    result = service.score_batch({'rows': rows})
+
+    assert [r['reg_no'] for r in result['results']] == ['ok']
+    assert result['rejected'] == 4
+    assert [(i['row'], i['column'], i['issue']) for i in result['issues']] == [
+        (0, 'ass1', 'non_numeric'), (1, 'reg_no', 'invalid_type'), (2, 'test1', 'non_numeric'),
+        (4, 'test2', 'out_of_range')]
+    assert result['results'][0]['total'] == service.score_one(MARKS)['total']
+
+
+def test_rows_must_be_objects(service):
+    with pytest.raises(RequestError):
+        service.score_batch({'rows': [1, 2]})
+
+
+def test_programme_picks_its_model(service, models_dir):
+    model = write_model(models_dir / 'bachelor-of-engineering__2024.cmf', True)
+    low = {'ass1': 1.0, 'ass2': 1.0, 'test1': 3.0, 'test2': 2.0}
+
+    one = service.score_one(dict(low, programme='Bachelor of Engineering', year='2024'))
+    batch = service.score_batch({'rows': [low], 'programme': 'Bachelor of Engineering', 'year': 2024})
+    assert one['model_version'] == batch['model_version'] == model.version
+    assert one['eligible_ai'] and batch['results'][0]['eligible_ai']
+    assert not service.score_one(low)['eligible_ai']
@@ -0,0 +1,138 @@
+"""Lightweight timing spans for the app's hot paths.
+
+    timings = Timings(enabled=True)
+    with timings.span('predict'):
+        ...
+
+Each span keeps a count, a running total and a bounded window of recent
+durations for p50/p95/p99. When disabled, span() hands back one shared
+no-op context manager, so instrumented code costs a method call and nothing
+else. MetricsWriter periodically writes the aggregates (plus any gauges,
+e.g. cache hits) as a Prometheus text file for the node exporter's
+textfile collector.
+"""
+import functools
+import os
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+
+import numpy as np
+
+_NOOP = nullcontext()
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class _Span:
+    __slots__ = ('timings', 'name', 'start')
+
+    def __init__(self, timings, name):
+        self.timings = timings
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.timings.record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class Timings:
+
+    def __init__(self, enabled=True, window=2048):
+        self.enabled = enabled
+        self.window = window
+        self._spans = {}  # name -> [count, total seconds, deque of recent durations]
+        self._lock = threading.Lock()
+
+    def span(self, name):
+        return _Span(self, name) if self.enabled else _NOOP
+
+    def timed(self, name):
+        # Decorator form of span(); returns the function untouched when disabled
+        def decorate(fn):
+            if not self.enabled:
+                return fn
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with _Span(self, name):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def record(self, name, seconds):
+        if not self.enabled:
+            return
+        with self._lock:
+            entry = self._spans.get(name)
+            if entry is None:
+                entry = self._spans[name] = [0, 0.0, deque(maxlen=self.window)]
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2].append(seconds)
+
+    def _snapshot(self):
+        with self._lock:
+            return {name: (count, total, np.array(recent)) for name, (count, total, recent) in self._spans.items()}
+
+    def stats(self):
+        # Milliseconds per span; percentiles over the most recent `window` calls
+        out = {}
+        for name, (count, total, recent) in sorted(self._snapshot().items()):
+            q = np.quantile(recent, QUANTILES) * 1000
+            out[name] = {
+                "count": count,
+                "mean_ms": round(total / count * 1000, 3),
+                "p50_ms": round(float(q[0]), 3),
+                "p95_ms": round(float(q[1]), 3),
+                "p99_ms": round(float(q[2]), 3),
+            }
+        return out
+
+    def prometheus(self, prefix='exam', gauges=None):
+        # Prometheus text exposition format: one summary for all spans, then the gauges
+        metric = f"{prefix}_span_seconds"
+        lines = [f"# HELP {metric} Time spent in instrumented sections.", f"# TYPE {metric} summary"]
+        for name, (count, total, recent) in sorted(self._snapshot().items()):
+            for quantile, value in zip(QUANTILES, np.quantile(recent, QUANTILES)):
+                lines.append(f'{metric}{{span="{name}",quantile="{quantile}"}} {value:.9f}')
+            lines.append(f'{metric}_sum{{span="{name}"}} {total:.9f}')
+            lines.append(f'{metric}_count{{span="{name}"}} {count}')
+        for name, value in sorted((gauges or {}).items()):
+            lines.append(f"# TYPE {prefix}_{name} gauge")
+            lines.append(f"{prefix}_{name} {float(value)}")
+        return "\n".join(lines) + "\n"
+
+
+class MetricsWriter:
+    # Background thread that rewrites `path` every `interval` seconds.
+    # gauges: optional callable returning {metric name: number}
+
+    def __init__(self, timings, path, interval=15.0, gauges=None):
+        self.timings = timings
+        self.path = path
+        self.interval = interval
+        self.gauges = gauges
+        self._failed_writes = 0
+        self._thread = threading.Thread(target=self._run, name="metrics-writer", daemon=True)
+        self._thread.start()
+
+    def write(self):
+        text = self.timings.prometheus(gauges=self.gauges() if self.gauges else None)
+        # Write then rename so the exporter never scrapes a half-written file
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp, self.path)
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.write()
+            except Exception:
+                self._failed_writes += 1
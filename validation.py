@@ -0,0 +1,88 @@
+"""Vectorized validation of bulk marks tables.
+
+Every check is an array mask over whole columns - no Python loop per row -
+so multi-million-row files validate in one pass. The result is the clean
+rows (marks converted to float) plus a compact long-format report with one
+line per (row, column, issue).
+"""
+import numpy as np
+
+from scoring import MARK_COLUMNS, MAX_MARKS, MARK_STEP
+
+REG_COLUMN = 'reg_no'
+YEAR_COLUMN = 'year'
+MARK_ISSUES = ('missing', 'non_numeric', 'out_of_range', 'off_step')
+
+
+def validate_marks(df, require_reg_no=False, check_reg_no=True):
+    # Returns (clean rows, report DataFrame with columns row, reg_no, column, issue).
+    # reg_no is checked for blanks/duplicates whenever the column is present,
+    # unless check_reg_no is False (e.g. multi-year training data). A year column may be
+    # blank (the caller's default applies) but otherwise must be a whole number - "2024/25"
+    # is rejected - and comes back as a nullable integer column.
+    import pandas as pd
+
+    required = MARK_COLUMNS + ([REG_COLUMN] if require_reg_no else [])
+    missing = [c for c in required if c not in df.columns]
+    if missing:
+        raise ValueError(f"Marks table is missing column(s): {', '.join(missing)}")
+
+    n = len(df)
+    marks = np.empty((n, len(MARK_COLUMNS)), dtype=np.float64)
+    labels, masks = [], []
+
+    for j, col in enumerate(MARK_COLUMNS):
+        raw = df[col]
+        values = pd.to_numeric(raw, errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+        absent = raw.isna().to_numpy()
+        nan = np.isnan(values)
+        with np.errstate(invalid='ignore'):
+            out_of_range = (values < 0) | (values > MAX_MARKS[col])
+            steps = values / MARK_STEP
+            off_step = (np.rint(steps) != steps) & ~nan
+        marks[:, j] = values
+        for issue, mask in zip(MARK_ISSUES, (absent, nan & ~absent, out_of_range, off_step)):
+            labels.append((col, issue))
+            masks.append(mask)
+
+    reg = None
+    if (check_reg_no or require_reg_no) and REG_COLUMN in df.columns:
+        reg = df[REG_COLUMN].astype('string').str.strip().fillna('')
+        absent = (reg == '').to_numpy(dtype=bool)
+        duplicate = reg.duplicated(keep=False).to_numpy(dtype=bool) & ~absent
+        labels += [(REG_COLUMN, 'missing'), (REG_COLUMN, 'duplicate')]
+        masks += [absent, duplicate]
+
+    years = None
+    if YEAR_COLUMN in df.columns:
+        raw = df[YEAR_COLUMN]
+        years = pd.to_numeric(raw, errors='coerce')
+        blank = (raw.isna() | (raw.astype('string').str.strip() == '')).to_numpy(dtype=bool)
+        with np.errstate(invalid='ignore'):
+            invalid = ~blank & (years.isna() | (years != years.round())).to_numpy(dtype=bool)
+        labels.append((YEAR_COLUMN, 'invalid'))
+        masks.append(invalid)
+
+    issues = np.column_stack(masks) if masks else np.zeros((n, 0), dtype=bool)
+    bad = issues.any(axis=1)
+
+    # Long-format report straight from the issue matrix
+    rows, kinds = np.nonzero(issues)
+    report = pd.DataFrame({
+        'row': df.index.to_numpy()[rows],
+        'reg_no': reg.to_numpy()[rows] if reg is not None else None,
+        'column': np.array([c for c, _ in labels], dtype=object)[kinds],
+        'issue': np.array([i for _, i in labels], dtype=object)[kinds],
+    })
+
+    clean = df.loc[~bad].copy()
+    clean[MARK_COLUMNS] = marks[~bad]
+    if years is not None:
+        clean[YEAR_COLUMN] = years[~bad].astype('Int64')
+    return clean, report
+
+
+def summarize(report):
+    # Issue counts per column, e.g. {"test1: out_of_range": 3}
+    counts = report.groupby(['column', 'issue'], sort=False).size()
+    return {f"{col}: {issue}": int(n) for (col, issue), n in counts.items()}